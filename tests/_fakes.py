@@ -0,0 +1,79 @@
+"""資料庫連線的輕量替身。
+
+取代多層 MagicMock，只實作 stock_service 用到的介面。
+"""
+
+
+class FakeMappings(list):
+    """模擬 Result.mappings() 的回傳值。"""
+
+    def first(self):
+        """回傳第一筆資料，無資料時回傳 None。"""
+        return self[0] if self else None
+
+
+class FakeResult:
+    """模擬 SQLAlchemy Result。"""
+
+    def __init__(self, rows: list[dict]) -> None:
+        """初始化查詢結果。
+
+        Args:
+            rows: 各列以 dict 表示的查詢結果。
+        """
+        self._rows = rows
+
+    def mappings(self) -> FakeMappings:
+        """回傳以 dict 表示的各列。"""
+        return FakeMappings(self._rows)
+
+
+class FakeConn:
+    """模擬 SQLAlchemy Connection，依序回傳預先設定的結果。
+
+    Attributes:
+        executed: 每次 execute 收到的（statement, parameters）。
+        options: 最近一次 execution_options 設定的選項。
+    """
+
+    def __init__(self, results: list[FakeResult]) -> None:
+        """初始化連線。
+
+        Args:
+            results: 每次 execute 依序回傳的結果。
+        """
+        self._results = iter(results)
+        self.executed: list[tuple] = []
+        self.options: dict = {}
+
+    def execution_options(self, **options) -> "FakeConn":
+        """記錄執行選項並回傳自身。"""
+        self.options = options
+        return self
+
+    def execute(self, statement, parameters=None) -> FakeResult:
+        """記錄查詢並回傳下一個結果。"""
+        self.executed.append((statement, parameters))
+        return next(self._results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+class FakeEngine:
+    """模擬 SQLAlchemy Engine，connect() 回傳同一個 FakeConn。"""
+
+    def __init__(self, conn: FakeConn) -> None:
+        """初始化 engine。
+
+        Args:
+            conn: connect() 回傳的連線。
+        """
+        self._conn = conn
+
+    def connect(self) -> FakeConn:
+        """回傳預先設定的連線。"""
+        return self._conn
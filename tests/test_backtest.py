@@ -4,6 +4,7 @@
 """
 
 import unittest
+from unittest.mock import patch
 
 from tw_stock_indicator.models.rules import (
     Condition,
@@ -64,6 +65,17 @@ class TestIndicatorCalculator(unittest.TestCase):
         result = indicator_calculator.calc_ma([], 5)
         self.assertEqual(result, [])
 
+    def test_calc_ma_many_matches_calc_ma(self):
+        """確認一次計算多個期數與逐一計算結果相同。"""
+        closes = [100.0 + (i * 7 % 11) for i in range(30)]
+        result = indicator_calculator.calc_ma_many(closes, (5, 20, 40))
+
+        for period in (5, 20, 40):
+            self.assertEqual(
+                result[period], indicator_calculator.calc_ma(closes, period)
+            )
+        self.assertTrue(all(v is None for v in result[40]))
+
     def test_calc_rsi_range(self):
         """確認 RSI 介於 0~100。"""
         closes = [float(i) for i in range(1, 30)]
@@ -100,6 +112,17 @@ class TestIndicatorCalculator(unittest.TestCase):
         self.assertIn("K", result)
         self.assertIn("D", result)
 
+    def test_calc_kd_rolling_window(self):
+        """確認 RSV 只取回看視窗內的最高價與最低價。"""
+        highs = [10.0, 5.0, 4.0, 3.0, 9.0]
+        lows = [1.0, 2.0, 2.0, 2.0, 2.0]
+        closes = [5.0, 4.0, 3.0, 3.0, 8.0]
+        # smooth=1 時 K 即為 RSV
+        result = indicator_calculator.calc_kd(
+            highs, lows, closes, period=3, smooth=1
+        )
+        self.assertEqual(result["K"], [None, None, 22.22, 33.33, 85.71])
+
     def test_calc_bollinger_keys(self):
         """確認布林通道回傳正確的 key。"""
         closes = [100.0 + i * 0.3 for i in range(30)]
@@ -108,6 +131,35 @@ class TestIndicatorCalculator(unittest.TestCase):
         self.assertIn("中軌", result)
         self.assertIn("下軌", result)
 
+    def test_calc_bollinger_matches_window_stats(self):
+        """確認滑動更新的中軌與標準差與逐窗計算一致。"""
+        import statistics
+
+        closes = [100.0 + (i * 7 % 11) - (i % 3) * 2.5 for i in range(60)]
+        result = indicator_calculator.calc_bollinger(closes, period=5)
+
+        for i in range(4, 60):
+            window = closes[i - 4:i + 1]
+            mean = statistics.fmean(window)
+            std = statistics.pstdev(window)
+            self.assertAlmostEqual(result["中軌"][i], mean, places=9)
+            self.assertAlmostEqual(result["上軌"][i], mean + 2 * std, places=9)
+            self.assertAlmostEqual(result["下軌"][i], mean - 2 * std, places=9)
+        self.assertIsNone(result["中軌"][3])
+
+    def test_calc_bollinger_flat_after_volatile(self):
+        """確認劇烈波動後的平盤區間通道寬度為 0。"""
+        # 平盤自第 23 根開始，不與每 period 根的整窗重算對齊
+        closes = [100.0, 455.5, 13.3, 871.1] * 5 + [455.5, 13.3, 871.1]
+        closes += [455.5] * 30
+        result = indicator_calculator.calc_bollinger(closes)
+
+        # 視窗完全落在平盤區間後，上下軌與中軌相同
+        for i in range(42, len(closes)):
+            self.assertEqual(result["中軌"][i], 455.5)
+            self.assertEqual(result["上軌"][i], 455.5)
+            self.assertEqual(result["下軌"][i], 455.5)
+
     def test_build_indicator_series(self):
         """確認 build_indicator_series 產出所有預期 key。"""
         daily = _make_daily([100.0 + i for i in range(30)])
@@ -122,6 +174,57 @@ class TestIndicatorCalculator(unittest.TestCase):
             self.assertIn(key, series, f"缺少 key: {key}")
             self.assertEqual(len(series[key]), 30)
 
+    def test_build_indicator_series_needed_only(self):
+        """確認指定 needed 時只計算引用到的指標家族。"""
+        daily = _make_daily([100.0 + i for i in range(30)])
+        series = indicator_calculator.build_indicator_series(
+            daily, {"MA5", "K", "50"}
+        )
+
+        self.assertEqual(
+            set(series),
+            {"收盤價", "MA5", "K", "D", "0", "20", "30", "50", "70", "80"},
+        )
+
+    def test_build_indicator_series_reuses_same_data(self):
+        """確認內容相同的日線資料不重複計算指標。"""
+        closes = [100.0 + i for i in range(30)]
+        indicator_calculator.reset_series_cache()
+
+        with patch.object(
+            indicator_calculator, "calc_ma_many",
+            wraps=indicator_calculator.calc_ma_many,
+        ) as mock_ma:
+            first = indicator_calculator.build_indicator_series(
+                _make_daily(closes), {"MA5"}
+            )
+            second = indicator_calculator.build_indicator_series(
+                _make_daily(closes), {"MA5", "MA10"}
+            )
+            indicator_calculator.build_indicator_series(
+                _make_daily(closes[::-1]), {"MA5"}
+            )
+
+        self.assertEqual(first["MA5"], second["MA5"])
+        # MA5、MA10 各一次，內容不同的資料再一次
+        self.assertEqual(mock_ma.call_count, 3)
+
+    def test_build_indicator_series_cache_keeps_recent_data(self):
+        """確認切換至其他日線資料後再切回，仍沿用先前的計算結果。"""
+        closes = [100.0 + i for i in range(30)]
+        indicator_calculator.reset_series_cache()
+
+        with patch.object(
+            indicator_calculator, "calc_ma_many",
+            wraps=indicator_calculator.calc_ma_many,
+        ) as mock_ma:
+            for data in (closes, closes[::-1], closes):
+                indicator_calculator.build_indicator_series(
+                    _make_daily(data), {"MA5"}
+                )
+
+        self.assertEqual(mock_ma.call_count, 2)
+
     def test_constant_series(self):
         """確認常數序列值正確。"""
         daily = _make_daily([100.0] * 5)
@@ -133,6 +236,19 @@ class TestIndicatorCalculator(unittest.TestCase):
 class TestSignalEvaluator(unittest.TestCase):
     """訊號評估測試。"""
 
+    def _entry_signals(
+        self, conditions, series, n, logic_operators=(), reset_cache=True,
+    ):
+        """以單一進場群組產出訊號並回傳 entry_signals。"""
+        if reset_cache:
+            signal_evaluator.reset_signal_cache()
+        group = RuleGroup(name="test", rule_type="entry")
+        group.conditions = list(conditions)
+        group.logic_operators = list(logic_operators)
+        return signal_evaluator.generate_signals([group], series, n)[
+            "entry_signals"
+        ]
+
     def test_cross_above(self):
         """確認上穿判斷正確。"""
         series = {
@@ -146,12 +262,11 @@ class TestSignalEvaluator(unittest.TestCase):
             right_param="MA20",
         )
 
-        # idx=0 無前一根
-        self.assertFalse(signal_evaluator._eval_condition(cond, series, 0))
-        # idx=1 MA5 從 10→15，仍 <= 20
-        self.assertFalse(signal_evaluator._eval_condition(cond, series, 1))
+        # idx=0 無前一根；idx=1 MA5 從 10→15，仍 <= 20；
         # idx=2 MA5 從 15→22，前一根 15<=20，當根 22>20 → 上穿
-        self.assertTrue(signal_evaluator._eval_condition(cond, series, 2))
+        self.assertEqual(
+            self._entry_signals([cond], series, 3), [False, False, True]
+        )
 
     def test_cross_below(self):
         """確認下穿判斷正確。"""
@@ -166,8 +281,11 @@ class TestSignalEvaluator(unittest.TestCase):
             right_param="MA20",
         )
 
+        # idx=1 MA5 從 22→20，當根未 < 20；
         # idx=2 MA5 從 20→18，前一根 20>=20，當根 18<20 → 下穿
-        self.assertTrue(signal_evaluator._eval_condition(cond, series, 2))
+        self.assertEqual(
+            self._entry_signals([cond], series, 3), [False, False, True]
+        )
 
     def test_gt_operator(self):
         """確認大於運算子判斷正確。"""
@@ -178,8 +296,7 @@ class TestSignalEvaluator(unittest.TestCase):
             operator=Operator.GT,
             right_param="70",
         )
-        self.assertFalse(signal_evaluator._eval_condition(cond, series, 0))
-        self.assertTrue(signal_evaluator._eval_condition(cond, series, 1))
+        self.assertEqual(self._entry_signals([cond], series, 2), [False, True])
 
     def test_none_value_returns_false(self):
         """確認指標值為 None 時回傳 False。"""
@@ -190,10 +307,9 @@ class TestSignalEvaluator(unittest.TestCase):
             operator=Operator.GT,
             right_param="MA20",
         )
-        self.assertFalse(signal_evaluator._eval_condition(cond, series, 0))
-        self.assertFalse(signal_evaluator._eval_condition(cond, series, 1))
+        self.assertEqual(self._entry_signals([cond], series, 2), [False, False])
 
-    def test_eval_rule_group_and(self):
+    def test_rule_group_and(self):
         """確認 AND 組合正確。"""
         series = {
             "MA5": [25.0],
@@ -201,17 +317,18 @@ class TestSignalEvaluator(unittest.TestCase):
             "RSI12": [65.0],
             "70": [70.0],
         }
-        group = RuleGroup(name="test", rule_type="entry")
-        group.conditions = [
+        conditions = [
             Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20"),
             Condition(IndicatorType.RSI, "RSI12", Operator.LT, "70"),
         ]
-        group.logic_operators = [LogicOperator.AND]
 
         # MA5>MA20=True, RSI12<70=True → AND → True
-        self.assertTrue(signal_evaluator._eval_rule_group(group, series, 0))
+        self.assertEqual(
+            self._entry_signals(conditions, series, 1, [LogicOperator.AND]),
+            [True],
+        )
 
-    def test_eval_rule_group_and_false(self):
+    def test_rule_group_and_false(self):
         """確認 AND 組合有一條件不成立時回傳 False。"""
         series = {
             "MA5": [25.0],
@@ -219,17 +336,49 @@ class TestSignalEvaluator(unittest.TestCase):
             "RSI12": [75.0],
             "70": [70.0],
         }
-        group = RuleGroup(name="test", rule_type="entry")
-        group.conditions = [
+        conditions = [
             Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20"),
             Condition(IndicatorType.RSI, "RSI12", Operator.LT, "70"),
         ]
-        group.logic_operators = [LogicOperator.AND]
 
         # MA5>MA20=True, RSI12<70=False → AND → False
-        self.assertFalse(signal_evaluator._eval_rule_group(group, series, 0))
+        self.assertEqual(
+            self._entry_signals(conditions, series, 1, [LogicOperator.AND]),
+            [False],
+        )
+
+    def test_rule_group_short_circuit(self):
+        """確認整段結果已確定時不再評估後續條件。"""
+        signal_evaluator.reset_signal_cache()
+        series = {
+            "MA5": [15.0, 16.0],
+            "MA20": [20.0, 20.0],
+            "RSI12": [25.0, 35.0],
+            "30": [30.0, 30.0],
+            "40": [40.0, 40.0],
+        }
+        all_false = Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20")
+        skipped_by_and = Condition(IndicatorType.RSI, "RSI12", Operator.LT, "30")
+        all_true = Condition(IndicatorType.RSI, "RSI12", Operator.LT, "40")
+        skipped_by_or = Condition(IndicatorType.RSI, "RSI12", Operator.GT, "30")
+        group = RuleGroup(name="test", rule_type="entry")
+        # ((False AND 略過) OR True) OR 略過
+        group.conditions = [all_false, skipped_by_and, all_true, skipped_by_or]
+        group.logic_operators = [
+            LogicOperator.AND, LogicOperator.OR, LogicOperator.OR,
+        ]
+
+        with patch.object(
+            signal_evaluator, "_eval_condition_series",
+            wraps=signal_evaluator._eval_condition_series,
+        ) as mock_eval:
+            signals = signal_evaluator.generate_signals([group], series, 2)
+
+        self.assertEqual(signals["entry_signals"], [True, True])
+        evaluated = [call.args[0] for call in mock_eval.call_args_list]
+        self.assertEqual(evaluated, [all_false, all_true])
 
-    def test_eval_rule_group_or(self):
+    def test_rule_group_or(self):
         """確認 OR 組合正確。"""
         series = {
             "MA5": [15.0],
@@ -237,15 +386,16 @@ class TestSignalEvaluator(unittest.TestCase):
             "RSI12": [65.0],
             "70": [70.0],
         }
-        group = RuleGroup(name="test", rule_type="entry")
-        group.conditions = [
+        conditions = [
             Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20"),
             Condition(IndicatorType.RSI, "RSI12", Operator.LT, "70"),
         ]
-        group.logic_operators = [LogicOperator.OR]
 
         # MA5>MA20=False, RSI12<70=True → OR → True
-        self.assertTrue(signal_evaluator._eval_rule_group(group, series, 0))
+        self.assertEqual(
+            self._entry_signals(conditions, series, 1, [LogicOperator.OR]),
+            [True],
+        )
 
     def test_generate_signals_or_between_groups(self):
         """確認同類型多群組間為 OR 關係。"""
@@ -270,11 +420,97 @@ class TestSignalEvaluator(unittest.TestCase):
         # 任一群組成立即觸發
         self.assertTrue(signals["entry_signals"][0])
 
+    def test_generate_signals_dedupes_identical_conditions(self):
+        """確認不同群組中內容相同的條件只評估一次。"""
+        series = {"MA5": [10.0, 25.0], "MA20": [20.0, 20.0]}
+        g1 = RuleGroup(name="g1", rule_type="entry")
+        g1.conditions = [
+            Condition(IndicatorType.MA, "MA5", Operator.CROSS_ABOVE, "MA20"),
+        ]
+        g2 = RuleGroup(name="g2", rule_type="exit")
+        g2.conditions = [
+            Condition(IndicatorType.MA, "MA5", Operator.CROSS_ABOVE, "MA20"),
+        ]
+
+        with patch.object(
+            signal_evaluator, "_eval_condition_series",
+            wraps=signal_evaluator._eval_condition_series,
+        ) as mock_eval:
+            signals = signal_evaluator.generate_signals([g1, g2], series, 2)
+
+        self.assertEqual(mock_eval.call_count, 1)
+        self.assertEqual(signals["entry_signals"], [False, True])
+        self.assertEqual(signals["exit_signals"], [False, True])
+
+    def test_generate_signals_reuses_results_across_calls(self):
+        """確認同一組序列再次評估時沿用先前結果，序列不同時重新評估。"""
+        signal_evaluator.reset_signal_cache()
+        series = {"MA5": [10.0, 25.0], "MA20": [20.0, 20.0]}
+        group = RuleGroup(name="g", rule_type="entry")
+        group.conditions = [
+            Condition(IndicatorType.MA, "MA5", Operator.CROSS_ABOVE, "MA20"),
+        ]
+
+        with patch.object(
+            signal_evaluator, "_eval_condition_series",
+            wraps=signal_evaluator._eval_condition_series,
+        ) as mock_eval:
+            first = signal_evaluator.generate_signals([group], series, 2)
+            second = signal_evaluator.generate_signals([group], series, 2)
+            self.assertEqual(mock_eval.call_count, 1)
+
+            other = {"MA5": [25.0, 10.0], "MA20": [20.0, 20.0]}
+            third = signal_evaluator.generate_signals([group], other, 2)
+
+        self.assertEqual(mock_eval.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertEqual(third["entry_signals"], [False, False])
+
+    def test_signal_cache_ignores_entry_for_other_series(self):
+        """確認快取 key 的 id 相同但序列物件不同時重新評估。"""
+        signal_evaluator.reset_signal_cache()
+        series = {"MA5": [10.0, 25.0], "MA20": [20.0, 20.0]}
+        cond = Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20")
+        # 模擬舊序列被回收後 id 被新序列重用的殘留項目
+        stale_key = (cond.signature, id(series["MA5"]), id(series["MA20"]), 2)
+        signal_evaluator._signal_cache[stale_key] = ([0.0], [0.0], [True, True])
+
+        self.assertEqual(
+            self._entry_signals([cond], series, 2, reset_cache=False),
+            [False, True],
+        )
+
     def test_empty_conditions_returns_false(self):
         """確認空條件的群組回傳 False。"""
-        group = RuleGroup(name="empty", rule_type="entry")
         series = {"MA5": [10.0]}
-        self.assertFalse(signal_evaluator._eval_rule_group(group, series, 0))
+        self.assertEqual(self._entry_signals([], series, 1), [False])
+
+    def test_condition_series_warmup_and_short_series(self):
+        """確認各運算子在暖機期與序列長度不足時的整段評估結果。"""
+        # MA20 比 K 棒數少一根，最後一根視為無資料
+        series = {
+            "MA5": [None, 15.0, 22.0, 20.0, 18.0, None, 25.0],
+            "MA20": [20.0, 20.0, 20.0, 20.0, 20.0, 20.0],
+        }
+        expected = {
+            Operator.GT: [False, False, True, False, False, False, False],
+            Operator.GTE: [False, False, True, True, False, False, False],
+            Operator.LT: [False, True, False, False, True, False, False],
+            Operator.LTE: [False, True, False, True, True, False, False],
+            Operator.CROSS_ABOVE: [False, False, True, False, False, False, False],
+            Operator.CROSS_BELOW: [False, False, False, False, True, False, False],
+        }
+        float_series = {
+            key: signal_evaluator._to_float_series(values, 7)
+            for key, values in series.items()
+        }
+        for op in Operator:
+            cond = Condition(IndicatorType.MA, "MA5", op, "MA20")
+            self.assertEqual(
+                signal_evaluator._eval_condition_series(cond, float_series, 7),
+                expected[op],
+                op,
+            )
 
 
 class TestBacktestService(unittest.TestCase):
@@ -381,6 +617,20 @@ class TestBacktestService(unittest.TestCase):
         self.assertIsNone(codes["profit_factor"].value)
         self.assertEqual(codes["profit_factor"].formatted_value(), "--")
 
+    def test_max_drawdown_from_equity_peak(self):
+        """確認最大回撤以資產曲線的歷史高點計算。"""
+        # 初始資本 100000，資產曲線 100000 → 120000 → 90000 → 130000 → 117000
+        trades = [
+            {"entry_price": 100.0, "buy_fee": 0, "pnl": pnl}
+            for pnl in (20000.0, -30000.0, 40000.0, -13000.0)
+        ]
+        daily = _make_daily([100.0] * 10)
+        result = backtest_service._calc_performance(trades, daily, 1000)
+
+        codes = {ind.code: ind for ind in result}
+        # 最大跌幅為 120000 → 90000，即 25%
+        self.assertEqual(codes["max_drawdown"].value, -25.0)
+
 
 class TestTradeFees(unittest.TestCase):
     """交易稅費計算測試。"""
@@ -477,6 +727,36 @@ class TestTradeFees(unittest.TestCase):
             self.assertEqual(trade["pnl"], expected_pnl)
 
 
+class TestSimulateTrades(unittest.TestCase):
+    """交易模擬測試。"""
+
+    def test_signal_day_rules(self):
+        """確認進場當日的出場訊號有效、出場訊號當日不再進場。"""
+        daily = _make_daily([10.0 + i for i in range(8)])
+        entry = [True, False, True, True, False, False, False, False]
+        exit_ = [False, True, False, True, False, False, False, False]
+
+        trades = backtest_service._simulate_trades(daily, entry, exit_, 1000)
+
+        self.assertEqual(
+            [(t["entry_idx"], t["exit_idx"]) for t in trades],
+            [(1, 2), (3, 4)],
+        )
+
+    def test_open_position_forced_exit(self):
+        """確認最後仍持倉時以最後一根收盤價出場，最後一根的訊號不成交。"""
+        daily = _make_daily([10.0, 11.0, 12.0, 13.0])
+        entry = [False, True, False, True]
+        exit_ = [False, False, False, True]
+
+        trades = backtest_service._simulate_trades(daily, entry, exit_, 1000)
+
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0]["entry_idx"], 2)
+        self.assertEqual(trades[0]["exit_idx"], 3)
+        self.assertEqual(trades[0]["exit_price"], 13.0)
+
+
 class TestBacktestChartData(unittest.TestCase):
     """回測圖表資料測試。"""
 
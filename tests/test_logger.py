@@ -0,0 +1,63 @@
+"""日誌配置模組單元測試。"""
+
+import io
+import logging
+import os
+import unittest
+from unittest.mock import patch
+
+from tw_stock_indicator import logger as logger_module
+
+
+class TestLogBuffer(unittest.TestCase):
+    """檔案日誌緩衝測試。"""
+
+    def _make_handler(self, interval: float):
+        """建立寫入 StringIO 的緩衝 handler。"""
+        stream = io.StringIO()
+        handler = logger_module._TimedMemoryHandler(
+            capacity=100,
+            interval=interval,
+            flushLevel=logging.WARNING,
+            target=logging.StreamHandler(stream),
+        )
+        self.addCleanup(handler.close)
+        return handler, stream
+
+    def _record(self, level: int, msg: str) -> logging.LogRecord:
+        return logging.LogRecord("t", level, __file__, 0, msg, None, None)
+
+    def test_warning_flushes_immediately(self):
+        """確認 INFO 先緩衝，WARNING 連同先前紀錄立即寫入。"""
+        handler, stream = self._make_handler(interval=60)
+        handler.handle(self._record(logging.INFO, "info"))
+        self.assertEqual(stream.getvalue(), "")
+
+        handler.handle(self._record(logging.WARNING, "warn"))
+        self.assertEqual(stream.getvalue(), "info\nwarn\n")
+
+    def test_periodic_flush(self):
+        """確認未達寫入條件的紀錄也會定期寫入。"""
+        handler, stream = self._make_handler(interval=0.01)
+        handler.handle(self._record(logging.INFO, "info"))
+        for _ in range(200):
+            if stream.getvalue():
+                break
+            handler._stop_event.wait(0.01)
+        self.assertEqual(stream.getvalue(), "info\n")
+
+    def test_invalid_buffer_size_falls_back(self):
+        """確認 LOG_BUFFER_SIZE 無效時改用預設值。"""
+        for value in ("abc", "0", "-5"):
+            with self.subTest(value=value), \
+                    patch.dict(os.environ, {"LOG_BUFFER_SIZE": value}):
+                self.assertEqual(
+                    logger_module._log_buffer_size(),
+                    logger_module._DEFAULT_LOG_BUFFER_SIZE,
+                )
+        with patch.dict(os.environ, {"LOG_BUFFER_SIZE": "16"}):
+            self.assertEqual(logger_module._log_buffer_size(), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
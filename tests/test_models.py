@@ -73,6 +73,15 @@ class TestIndicator(unittest.TestCase):
         )
         with self.assertRaises(AttributeError):
             ind.value = 2.0
+        self.assertFalse(hasattr(ind, "__dict__"))
+
+    def test_formatted_cache_not_in_eq_or_repr(self):
+        """確認預先格式化的快取不影響相等比較與 repr。"""
+        a = Indicator(code="t", name="測試", value=1.0, unit="%", description="")
+        b = Indicator(code="t", name="測試", value=1.0, unit="%", description="")
+        self.assertEqual(a, b)
+        self.assertNotIn("_formatted", repr(a))
+        self.assertEqual(a.formatted_value(), "1.0%")
 
 
 class TestRuleModels(unittest.TestCase):
@@ -100,6 +109,15 @@ class TestRuleModels(unittest.TestCase):
         self.assertEqual(cond.left_param, "MA5")
         self.assertIsNotNone(cond.id)
 
+    def test_condition_frozen_and_signature(self):
+        """確認 Condition 不可變，且 signature 不含 id。"""
+        a = Condition(IndicatorType.MA, "MA5", Operator.CROSS_ABOVE, "MA20")
+        b = Condition(IndicatorType.MA, "MA5", Operator.CROSS_ABOVE, "MA20")
+        with self.assertRaises(AttributeError):
+            a.left_param = "MA10"
+        self.assertNotEqual(a.id, b.id)
+        self.assertEqual(a.signature, b.signature)
+
     def test_create_rule_group(self):
         """確認可建立 RuleGroup。"""
         group = RuleGroup(name="測試規則", rule_type="entry")
@@ -107,6 +125,13 @@ class TestRuleModels(unittest.TestCase):
         self.assertEqual(group.rule_type, "entry")
         self.assertEqual(len(group.conditions), 0)
 
+    def test_rule_models_use_slots(self):
+        """確認規則物件不帶 __dict__。"""
+        cond = Condition(IndicatorType.MA, "MA5", Operator.GT, "MA20")
+        group = RuleGroup(name="測試", rule_type="entry")
+        self.assertFalse(hasattr(cond, "__dict__"))
+        self.assertFalse(hasattr(group, "__dict__"))
+
     def test_rule_group_with_conditions(self):
         """確認 RuleGroup 可包含條件。"""
         cond = Condition(
@@ -13,23 +13,31 @@ class TestWebBase(unittest.TestCase):
     """Web 測試基礎類別。
 
     測試預設關閉 SCRIPT_NAME 前綴，確保原有路由測試仍適用根路徑。
+    Flask app 每個測試類別只建立一次，各測試之間僅還原規則儲存。
     """
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """建立測試用 Flask 應用程式（無 SCRIPT_NAME 前綴）。"""
-        rule_service.reset_store()
-        self._saved_script_name = os.environ.get("SCRIPT_NAME")
+        cls._saved_script_name = os.environ.get("SCRIPT_NAME")
         os.environ["SCRIPT_NAME"] = ""
-        self.app = create_app()
-        self.app.config["TESTING"] = True
-        self.client = self.app.test_client()
+        rule_service.reset_store()
+        cls.app = create_app()
+        cls.app.config["TESTING"] = True
+        cls.client = cls.app.test_client()
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """還原 SCRIPT_NAME 環境變數。"""
-        if self._saved_script_name is None:
+        if cls._saved_script_name is None:
             os.environ.pop("SCRIPT_NAME", None)
         else:
-            os.environ["SCRIPT_NAME"] = self._saved_script_name
+            os.environ["SCRIPT_NAME"] = cls._saved_script_name
+
+    def setUp(self):
+        """以 create_app 相同的流程將規則儲存還原為預設規則。"""
+        rule_service.reset_store()
+        rule_service.load_default_rules()
 
 
 class TestDashboard(TestWebBase):
@@ -67,6 +75,24 @@ class TestDashboard(TestWebBase):
         self.assertIn('id="chart-section"', html)
         self.assertIn('id="main-chart"', html)
 
+    def test_index_rendered_once_until_rules_change(self):
+        """確認規則未變動時沿用已渲染的首頁，規則變動後重新渲染。"""
+        from tw_stock_indicator.web.routes import dashboard
+
+        with patch.object(
+            dashboard, "render_template", wraps=dashboard.render_template
+        ) as mock_render:
+            first = self.client.get("/")
+            second = self.client.get("/")
+            self.assertEqual(mock_render.call_count, 1)
+            self.assertEqual(first.data, second.data)
+
+            rule_service.create_rule_group("新增規則", "entry")
+            third = self.client.get("/")
+
+        self.assertEqual(mock_render.call_count, 2)
+        self.assertIn("新增規則", third.data.decode("utf-8"))
+
 
 class TestIndicatorAPI(TestWebBase):
     """指標 API 測試。"""
@@ -78,12 +104,58 @@ class TestIndicatorAPI(TestWebBase):
         data = json.loads(resp.data)
         self.assertIn("MA5", data["params"])
 
+    def test_get_params_body_cached(self):
+        """確認同一指標重複查詢回傳相同內容且只查詢一次參數對照。"""
+        from tw_stock_indicator.web.routes import api
+
+        api._indicator_params_body.cache_clear()
+        with patch.object(
+            rule_service, "get_indicator_params",
+            wraps=rule_service.get_indicator_params,
+        ) as mock_params:
+            first = self.client.get("/api/indicators/KD/params")
+            second = self.client.get("/api/indicators/KD/params")
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.mimetype, "application/json")
+        self.assertEqual(json.loads(first.data)["params"], ["K", "D", "20", "50", "80"])
+        mock_params.assert_called_once()
+
+        revalidated = self.client.get(
+            "/api/indicators/KD/params",
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
     def test_get_params_invalid(self):
         """確認未知指標回傳 400。"""
         resp = self.client.get("/api/indicators/INVALID/params")
         self.assertEqual(resp.status_code, 400)
 
 
+class TestJsonProvider(TestWebBase):
+    """orjson JSON provider 測試。"""
+
+    def test_response_is_utf8_json(self):
+        """確認回應為未跳脫的 UTF-8 JSON。"""
+        resp = self.client.get("/api/indicators/UNKNOWN/params")
+        self.assertEqual(resp.mimetype, "application/json")
+        self.assertIn("未知的指標類型".encode("utf-8"), resp.data)
+        self.assertEqual(
+            json.loads(resp.data), {"error": "未知的指標類型: UNKNOWN"}
+        )
+
+    def test_request_json_parsed(self):
+        """確認請求 JSON 經由 provider 正確解析。"""
+        resp = self.client.post(
+            "/api/rules",
+            data=json.dumps({"name": "測試規則", "rule_type": "entry"}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(json.loads(resp.data)["name"], "測試規則")
+
+
 class TestRuleAPI(TestWebBase):
     """規則 API 測試。"""
 
@@ -96,6 +168,22 @@ class TestRuleAPI(TestWebBase):
         # 預設載入兩組規則
         self.assertEqual(len(data), 2)
 
+    def test_list_rules_etag(self):
+        """確認規則未變動時以 ETag 回傳 304，變動後回傳新內容。"""
+        first = self.client.get("/api/rules")
+        etag = first.headers["ETag"]
+
+        cached = self.client.get("/api/rules", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        self.client.post(
+            "/api/rules", json={"name": "新規則", "rule_type": "entry"},
+        )
+        changed = self.client.get("/api/rules", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        self.assertEqual(len(json.loads(changed.data)), 3)
+
     def test_create_rule(self):
         """確認可建立規則群組。"""
         resp = self.client.post(
@@ -160,6 +248,29 @@ class TestRuleAPI(TestWebBase):
         )
         self.assertEqual(resp.status_code, 404)
 
+    def test_add_condition_invalid_enum_values(self):
+        """確認無效或非字串的列舉值回傳 400。"""
+        group_id = json.loads(self.client.get("/api/rules").data)[0]["id"]
+        base = {
+            "indicator_type": "MA",
+            "left_param": "MA5",
+            "operator": ">",
+            "right_param": "MA20",
+        }
+        cases = [
+            ({"operator": "!="}, "'!=' is not a valid Operator"),
+            ({"indicator_type": ["MA"]}, "['MA'] is not a valid IndicatorType"),
+            ({"logic_operator": "XOR"}, "'XOR' is not a valid LogicOperator"),
+        ]
+        for override, message in cases:
+            with self.subTest(override=override):
+                resp = self.client.post(
+                    f"/api/rules/{group_id}/conditions",
+                    json={**base, **override},
+                )
+                self.assertEqual(resp.status_code, 400)
+                self.assertEqual(json.loads(resp.data)["error"], message)
+
 
 class TestStockSearchAPI(TestWebBase):
     """股票搜尋 API 測試。"""
@@ -248,21 +359,32 @@ class TestStockDateRangeAPI(TestWebBase):
         self.assertEqual(resp.status_code, 400)
 
 
+def _backtest_body(n: int) -> bytes:
+    """建立 n 筆遞增日線資料的回測請求內容。"""
+    daily_data = [
+        {"date": f"2024-01-{i+1:02d}", "open": 100.0 + i,
+         "high": 102.0 + i, "low": 99.0 + i, "close": 101.0 + i,
+         "volume": 1000}
+        for i in range(n)
+    ]
+    return json.dumps({"daily_data": daily_data, "shares": 1000}).encode()
+
+
 class TestBacktestAPI(TestWebBase):
     """回測 API 測試。"""
 
+    @classmethod
+    def setUpClass(cls):
+        """建立 app 並預先編碼各測試共用的請求內容。"""
+        super().setUpClass()
+        cls._body_30 = _backtest_body(30)
+        cls._body_10 = _backtest_body(10)
+
     def test_backtest_success(self):
         """確認回測正確回傳指標、交易紀錄與指標序列。"""
-        daily_data = [
-            {"date": f"2024-01-{i+1:02d}", "open": 100.0 + i,
-             "high": 102.0 + i, "low": 99.0 + i, "close": 101.0 + i,
-             "volume": 1000}
-            for i in range(30)
-        ]
-
         resp = self.client.post(
             "/api/backtest",
-            data=json.dumps({"daily_data": daily_data, "shares": 1000}),
+            data=self._body_30,
             content_type="application/json",
         )
         self.assertEqual(resp.status_code, 200)
@@ -281,6 +403,7 @@ class TestBacktestAPI(TestWebBase):
         for trade in data["trades"]:
             self.assertIn("total_fees", trade)
         self.assertIsInstance(data["indicator_series"], dict)
+        self.assertNotIn("daily_data", data)
 
     def test_backtest_missing_data(self):
         """確認缺少 daily_data 回傳 400。"""
@@ -291,6 +414,48 @@ class TestBacktestAPI(TestWebBase):
         )
         self.assertEqual(resp.status_code, 400)
 
+    @patch("tw_stock_indicator.web.routes.api.stock_service.get_stock_daily")
+    def test_backtest_by_stock_and_range(self, mock_daily):
+        """確認只傳股票與日期區間時由伺服器查詢日線並回測。"""
+        mock_daily.return_value = json.loads(self._body_30)["daily_data"]
+
+        resp = self.client.post("/api/backtest", json={
+            "market": "twse", "code": "2330",
+            "start": "2024-01-01", "end": "2024-01-30", "shares": 1000,
+        })
+
+        self.assertEqual(resp.status_code, 200)
+        mock_daily.assert_called_once_with(
+            "TWSE", "2330", "2024-01-01", "2024-01-30"
+        )
+        data = json.loads(resp.data)
+        self.assertEqual(len(data["indicators"]), 8)
+        # 回傳回測所用的日線資料，前端以此繪圖，不必另外查詢
+        self.assertEqual(data["daily_data"], mock_daily.return_value)
+
+    @patch("tw_stock_indicator.web.routes.api.stock_service.get_stock_daily")
+    def test_backtest_by_stock_invalid_fields(self, mock_daily):
+        """確認以股票查詢回測時欄位無效回傳 400，且不查詢資料庫。"""
+        base = {
+            "market": "TWSE", "code": "2330",
+            "start": "2024-01-01", "end": "2024-01-30",
+        }
+        cases = [
+            ({"market": "NYSE"}, "market 必須為 TWSE 或 TPEX"),
+            ({"code": ""}, "code 必須為非空字串"),
+            ({"code": {"$ne": 1}}, "code 必須為非空字串"),
+            ({"start": ""}, "需要 start 和 end 參數"),
+            ({"end": None}, "需要 start 和 end 參數"),
+        ]
+        for override, message in cases:
+            with self.subTest(override=override):
+                resp = self.client.post(
+                    "/api/backtest", json={**base, **override},
+                )
+                self.assertEqual(resp.status_code, 400)
+                self.assertEqual(json.loads(resp.data)["error"], message)
+        mock_daily.assert_not_called()
+
     def test_backtest_insufficient_data(self):
         """確認日線資料不足回傳 400。"""
         resp = self.client.post(
@@ -310,16 +475,9 @@ class TestBacktestAPI(TestWebBase):
         """確認無規則時回傳 400。"""
         rule_service.reset_store()
 
-        daily_data = [
-            {"date": f"2024-01-{i+1:02d}", "open": 100.0 + i,
-             "high": 102.0 + i, "low": 99.0 + i, "close": 101.0 + i,
-             "volume": 1000}
-            for i in range(10)
-        ]
-
         resp = self.client.post(
             "/api/backtest",
-            data=json.dumps({"daily_data": daily_data, "shares": 1000}),
+            data=self._body_10,
             content_type="application/json",
         )
         self.assertEqual(resp.status_code, 400)
@@ -4,9 +4,73 @@
 """
 
 import logging
+import logging.handlers
 import os
+import threading
 from datetime import datetime
 
+# 檔案日誌的預設緩衝筆數，可由環境變數 LOG_BUFFER_SIZE 覆寫
+_DEFAULT_LOG_BUFFER_SIZE = 1024
+
+# 檔案日誌緩衝定期寫入的間隔秒數，伺服器閒置時日誌也不會長時間滯留記憶體
+_LOG_FLUSH_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedMemoryHandler(logging.handlers.MemoryHandler):
+    """除了緩衝滿或遇到指定等級外，也會定期寫入的 MemoryHandler。
+
+    以 daemon 執行緒每隔 interval 秒呼叫一次 flush，close 時停止。
+    """
+
+    def __init__(self, capacity: int, interval: float, **kwargs) -> None:
+        """初始化 handler 並啟動定期寫入執行緒。
+
+        Args:
+            capacity: 緩衝筆數上限。
+            interval: 定期寫入的間隔秒數。
+            **kwargs: 其餘 MemoryHandler 參數。
+        """
+        super().__init__(capacity, **kwargs)
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(
+            target=self._flush_periodically,
+            args=(interval,),
+            name="log-flush",
+            daemon=True,
+        )
+        self._flush_thread.start()
+
+    def _flush_periodically(self, interval: float) -> None:
+        """每隔 interval 秒寫入一次緩衝，直到 handler 關閉。"""
+        while not self._stop_event.wait(interval):
+            self.flush()
+
+    def close(self) -> None:
+        """停止定期寫入執行緒，寫入剩餘緩衝並關閉。"""
+        self._stop_event.set()
+        super().close()
+
+
+def _log_buffer_size() -> int:
+    """讀取環境變數 LOG_BUFFER_SIZE。
+
+    Returns:
+        緩衝筆數；未設定或不是正整數時回傳預設值。
+    """
+    value = os.environ.get("LOG_BUFFER_SIZE")
+    if value is None:
+        return _DEFAULT_LOG_BUFFER_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if size <= 0:
+        logger.warning("LOG_BUFFER_SIZE 無效（%s），改用預設值", value)
+        return _DEFAULT_LOG_BUFFER_SIZE
+    return size
+
 
 def setup_logger(name: str = "tw_stock_indicator") -> logging.Logger:
     """建立並回傳已配置的 logger。
@@ -16,6 +80,8 @@ def setup_logger(name: str = "tw_stock_indicator") -> logging.Logger:
 
     Returns:
         已設定 console 與 file handler 的 Logger 物件。
+        寫入檔案的紀錄先緩衝於記憶體，累積 LOG_BUFFER_SIZE 筆、
+        遇到 WARNING 以上等級、每隔 _LOG_FLUSH_INTERVAL 秒或程式結束時批次寫入。
     """
     logger = logging.getLogger(name)
 
@@ -41,9 +107,21 @@ def setup_logger(name: str = "tw_stock_indicator") -> logging.Logger:
     log_filename = datetime.now().strftime("%Y%m%d") + ".log"
     log_path = os.path.join(log_dir, log_filename)
 
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    file_handler = logging.FileHandler(log_path, encoding="utf-8", delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    # 以 MemoryHandler 緩衝，將逐筆 write 合併為批次寫入；WARNING 以上立即寫入，
+    # 其餘最多延遲 _LOG_FLUSH_INTERVAL 秒。程式結束時 logging.shutdown
+    # 會先關閉並清空此緩衝（Web 模式下 SIGTERM 也會觸發，見 main）
+    buffered_handler = _TimedMemoryHandler(
+        capacity=_log_buffer_size(),
+        interval=_LOG_FLUSH_INTERVAL,
+        flushLevel=logging.WARNING,
+        target=file_handler,
+        flushOnClose=True,
+    )
+    buffered_handler.setLevel(logging.DEBUG)
+    logger.addHandler(buffered_handler)
 
     return logger
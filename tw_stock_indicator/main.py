@@ -4,6 +4,9 @@
 """
 
 import argparse
+import logging
+import signal
+import sys
 
 from tw_stock_indicator import __version__
 from tw_stock_indicator.logger import setup_logger
@@ -28,10 +31,21 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def _handle_sigterm(signum, frame) -> None:
+    """收到 SIGTERM 時寫入緩衝中的日誌並結束程式。
+
+    容器中本程式為 PID 1，docker stop 只會送出 SIGTERM，
+    預設處理方式會直接終止程式而不經過 logging.shutdown。
+    """
+    logging.shutdown()
+    sys.exit(0)
+
+
 def main() -> None:
     """主程式入口。"""
-    logger = setup_logger()
+    # 先解析參數，--help 或參數錯誤時不必設定 logger 或建立 logs/ 目錄
     args = parse_args()
+    logger = setup_logger()
 
     logger.info("Tw Stock Indicator v%s 啟動", __version__)
 
@@ -39,6 +53,7 @@ def main() -> None:
         from tw_stock_indicator.web import create_app
 
         app = create_app()
+        signal.signal(signal.SIGTERM, _handle_sigterm)
         logger.info("啟動 Web 儀表板於 %s:%d", args.host, args.port)
         app.run(host=args.host, port=args.port, debug=False)
     else:
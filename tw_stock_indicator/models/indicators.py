@@ -3,10 +3,44 @@
 定義技術指標的資料結構與格式化方法。
 """
 
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
 
-@dataclass(frozen=True)
+def _format_percent(value: float, unit: str) -> str:
+    """百分比：直接附加 %。"""
+    return f"{value}%"
+
+
+def _format_plain(value: float, unit: str) -> str:
+    """倍數、次數：整數值加千分位，否則保留原始小數。"""
+    if value == int(value):
+        return f"{value:,.0f} {unit}"
+    return f"{value} {unit}"
+
+
+def _format_money(value: float, unit: str) -> str:
+    """金額：整數值加千分位，否則取兩位小數。"""
+    if value == int(value):
+        return f"{value:,.0f} {unit}"
+    return f"{value:,.2f} {unit}"
+
+
+def _format_default(value: float, unit: str) -> str:
+    """其他單位：數值後接單位。"""
+    return f"{value} {unit}"
+
+
+# 單位到格式化函式的對照表
+_FORMATTERS: dict[str, Callable[[float, str], str]] = {
+    "%": _format_percent,
+    "倍": _format_plain,
+    "次": _format_plain,
+    "元": _format_money,
+}
+
+
+@dataclass(frozen=True, slots=True)
 class Indicator:
     """股市技術指標。
 
@@ -23,6 +57,11 @@ class Indicator:
     value: float | None
     unit: str
     description: str
+    _formatted: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # 不可變物件的格式化結果固定，建立時算好一次
+        object.__setattr__(self, "_formatted", self._format_value())
 
     def formatted_value(self) -> str:
         """回傳帶單位的格式化數值字串。
@@ -31,12 +70,15 @@ class Indicator:
             格式化後的字串，例如 '62.5%'、'1.85 倍'。
             當 value 為 None 時回傳 '--'。
         """
+        return self._formatted
+
+    def _format_value(self) -> str:
+        """依單位將數值格式化為字串。
+
+        Returns:
+            格式化後的字串。
+        """
         if self.value is None:
             return "--"
-        if self.unit == "%":
-            return f"{self.value}%"
-        if self.unit in ("倍", "次"):
-            return f"{self.value:,.0f} {self.unit}" if self.value == int(self.value) else f"{self.value} {self.unit}"
-        if self.unit == "元":
-            return f"{self.value:,.0f} {self.unit}" if self.value == int(self.value) else f"{self.value:,.2f} {self.unit}"
-        return f"{self.value} {self.unit}"
+        formatter = _FORMATTERS.get(self.unit, _format_default)
+        return formatter(self.value, self.unit)
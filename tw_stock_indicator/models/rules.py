@@ -36,9 +36,9 @@ class LogicOperator(str, Enum):
     OR = "OR"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Condition:
-    """單一條件。
+    """單一條件（建立後不可修改）。
 
     Attributes:
         indicator_type: 技術指標類型。
@@ -54,8 +54,13 @@ class Condition:
     right_param: str
     id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
 
+    @property
+    def signature(self) -> tuple[str, Operator, str]:
+        """條件的比較內容（不含 id），內容相同的條件評估結果必定相同。"""
+        return (self.left_param, self.operator, self.right_param)
 
-@dataclass
+
+@dataclass(slots=True)
 class RuleGroup:
     """規則群組。
 
@@ -5,6 +5,7 @@
 
 import logging
 import math
+from itertools import accumulate
 
 from tw_stock_indicator.models.indicators import Indicator
 from tw_stock_indicator.models.rules import RuleGroup
@@ -24,6 +25,17 @@ _MIN_COMMISSION = 20
 # 證交稅費率 0.3%（僅賣出時收取）
 _TAX_RATE = 0.003
 
+# 不回傳給前端的序列：常數與收盤價（前端已有）
+_EXCLUDED_SERIES = frozenset({"0", "20", "30", "50", "70", "80", "收盤價"})
+
+# 同一指標的關聯序列，任一被引用時一併回傳：
+# 布林通道三條線、MACD 的 DIF/MACD/OSC、KD 的 K/D
+_RELATED_SERIES: dict[str, tuple[str, ...]] = {
+    name: group
+    for group in (("上軌", "中軌", "下軌"), ("DIF", "MACD", "OSC"), ("K", "D"))
+    for name in group
+}
+
 
 def _calc_commission(amount: float) -> int:
     """計算券商手續費。
@@ -40,22 +52,90 @@ def _calc_commission(amount: float) -> int:
     return max(math.floor(amount * _COMMISSION_RATE), _MIN_COMMISSION)
 
 
-def _zero_indicators() -> list[Indicator]:
-    """回傳全 0 的績效指標。"""
+# 績效指標定義（代碼、名稱、單位、說明），順序即輸出順序
+_INDICATOR_META = (
+    ("win_rate", "勝率", "%", "獲利交易佔總交易次數的比例"),
+    ("profit_factor", "獲利因子", "倍", "總獲利金額除以總虧損金額"),
+    ("expected_value", "期望值", "元", "每筆交易的平均預期損益"),
+    ("max_drawdown", "最大回撤", "%", "從資產高點到低點的最大跌幅"),
+    ("sharpe_ratio", "夏普比率", "倍", "每承受一單位風險所獲得的超額報酬"),
+    ("profit_loss_ratio", "平均獲利虧損比", "倍", "平均獲利金額除以平均虧損金額"),
+    ("annual_return", "年化報酬率", "%", "投資報酬換算為年度的複利報酬率"),
+    ("total_trades", "總交易次數", "次", "回測期間的總交易筆數"),
+)
+
+
+def _build_indicators(values: list[float | None]) -> list[Indicator]:
+    """依 _INDICATOR_META 順序組出績效指標列表。
+
+    Args:
+        values: 與 _INDICATOR_META 同順序的指標數值。
+
+    Returns:
+        Indicator 列表。
+    """
     return [
-        Indicator("win_rate", "勝率", 0.0, "%", "獲利交易佔總交易次數的比例"),
-        Indicator("profit_factor", "獲利因子", 0.0, "倍", "總獲利金額除以總虧損金額"),
-        Indicator("expected_value", "期望值", 0.0, "元", "每筆交易的平均預期損益"),
-        Indicator("max_drawdown", "最大回撤", 0.0, "%", "從資產高點到低點的最大跌幅"),
-        Indicator("sharpe_ratio", "夏普比率", 0.0, "倍", "每承受一單位風險所獲得的超額報酬"),
-        Indicator("profit_loss_ratio", "平均獲利虧損比", 0.0, "倍",
-                  "平均獲利金額除以平均虧損金額"),
-        Indicator("annual_return", "年化報酬率", 0.0, "%",
-                  "投資報酬換算為年度的複利報酬率"),
-        Indicator("total_trades", "總交易次數", 0, "次", "回測期間的總交易筆數"),
+        Indicator(code, name, value, unit, description)
+        for (code, name, unit, description), value in zip(_INDICATOR_META, values)
     ]
 
 
+# 全 0 的績效指標（Indicator 不可變，可於各次回測間共用）
+_ZERO_INDICATORS = tuple(
+    _build_indicators([0.0] * (len(_INDICATOR_META) - 1) + [0])
+)
+
+
+def _zero_indicators() -> list[Indicator]:
+    """回傳全 0 的績效指標。"""
+    return list(_ZERO_INDICATORS)
+
+
+def _close_trade(
+    entry_idx: int,
+    entry_price: float,
+    buy_amount: float,
+    buy_fee: int,
+    exit_idx: int,
+    exit_price: float,
+    dates: list,
+    shares: int,
+) -> dict:
+    """結算一筆交易的賣出稅費與損益。
+
+    Args:
+        entry_idx: 進場 K 棒索引。
+        entry_price: 進場價格。
+        buy_amount: 買進金額。
+        buy_fee: 買進手續費。
+        exit_idx: 出場 K 棒索引。
+        exit_price: 出場價格。
+        dates: 日期序列。
+        shares: 每筆交易股數。
+
+    Returns:
+        交易紀錄字典。
+    """
+    sell_amount = exit_price * shares
+    sell_fee = _calc_commission(sell_amount)
+    tax = math.floor(sell_amount * _TAX_RATE)
+    total_fees = buy_fee + sell_fee + tax
+    pnl = sell_amount - buy_amount - total_fees
+    return {
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "pnl": pnl,
+        "buy_fee": buy_fee,
+        "sell_fee": sell_fee,
+        "tax": tax,
+        "total_fees": total_fees,
+        "entry_idx": entry_idx,
+        "exit_idx": exit_idx,
+        "entry_date": dates[entry_idx],
+        "exit_date": dates[exit_idx],
+    }
+
+
 def _simulate_trades(
     daily_data: list[dict],
     entry_signals: list[bool],
@@ -79,66 +159,55 @@ def _simulate_trades(
         entry_idx、exit_idx、entry_date、exit_date。
     """
     n = len(daily_data)
+    # 迴圈前一次取出欄位，避免每根 K 棒重複查詢 dict
+    opens = [d["open"] for d in daily_data]
+    dates = [d["date"] for d in daily_data]
     trades: list[dict] = []
     in_position = False
     entry_price = 0.0
     entry_idx = 0
-
-    for i in range(n - 1):
-        if not in_position and entry_signals[i]:
-            # 訊號日 i → 次日 i+1 開盤買入
-            entry_price = daily_data[i + 1]["open"]
-            entry_idx = i + 1
-            in_position = True
-        elif in_position and exit_signals[i]:
-            # 訊號日 i → 次日 i+1 開盤賣出
-            exit_idx = i + 1
-            exit_price = daily_data[exit_idx]["open"]
-            buy_amount = entry_price * shares
-            sell_amount = exit_price * shares
-            buy_fee = _calc_commission(buy_amount)
-            sell_fee = _calc_commission(sell_amount)
-            tax = math.floor(sell_amount * _TAX_RATE)
-            total_fees = buy_fee + sell_fee + tax
-            pnl = sell_amount - buy_amount - total_fees
-            trades.append({
-                "entry_price": entry_price,
-                "exit_price": exit_price,
-                "pnl": pnl,
-                "buy_fee": buy_fee,
-                "sell_fee": sell_fee,
-                "tax": tax,
-                "total_fees": total_fees,
-                "entry_idx": entry_idx,
-                "exit_idx": exit_idx,
-                "entry_date": daily_data[entry_idx]["date"],
-                "exit_date": daily_data[exit_idx]["date"],
-            })
-            in_position = False
+    buy_amount = 0.0
+    buy_fee = 0
+
+    # 訊號通常很稀疏：以 list.index 直接跳到下一個進場／出場訊號，
+    # 不逐根 K 棒檢查。最後一根的訊號沒有次日可成交，故搜尋到 n - 1 為止。
+    last = n - 1
+    i = 0
+    while True:
+        try:
+            i = entry_signals.index(True, i, last)
+        except ValueError:
+            break
+
+        # 訊號日 i → 次日 i+1 開盤買入
+        entry_price = opens[i + 1]
+        entry_idx = i + 1
+        # 買進成本與手續費只取決於進場，於進場時計算一次
+        buy_amount = entry_price * shares
+        buy_fee = _calc_commission(buy_amount)
+        in_position = True
+
+        # 出場訊號從進場當日起才檢查
+        try:
+            i = exit_signals.index(True, entry_idx, last)
+        except ValueError:
+            break
+
+        # 訊號日 i → 次日 i+1 開盤賣出
+        trades.append(_close_trade(
+            entry_idx, entry_price, buy_amount, buy_fee,
+            i + 1, opens[i + 1], dates, shares,
+        ))
+        in_position = False
+        # 出場訊號當日不再進場，下一個進場訊號從次日起找
+        i += 1
 
     # 最後仍持倉：以最後一根收盤價強制出場
     if in_position:
-        exit_price = daily_data[-1]["close"]
-        buy_amount = entry_price * shares
-        sell_amount = exit_price * shares
-        buy_fee = _calc_commission(buy_amount)
-        sell_fee = _calc_commission(sell_amount)
-        tax = math.floor(sell_amount * _TAX_RATE)
-        total_fees = buy_fee + sell_fee + tax
-        pnl = sell_amount - buy_amount - total_fees
-        trades.append({
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "pnl": pnl,
-            "buy_fee": buy_fee,
-            "sell_fee": sell_fee,
-            "tax": tax,
-            "total_fees": total_fees,
-            "entry_idx": entry_idx,
-            "exit_idx": n - 1,
-            "entry_date": daily_data[entry_idx]["date"],
-            "exit_date": daily_data[n - 1]["date"],
-        })
+        trades.append(_close_trade(
+            entry_idx, entry_price, buy_amount, buy_fee,
+            n - 1, daily_data[-1]["close"], dates, shares,
+        ))
 
     return trades
 
@@ -162,12 +231,14 @@ def _calc_performance(
     if total_trades == 0:
         return _zero_indicators()
 
-    # 基礎統計
-    winning = [t for t in trades if t["pnl"] > 0]
-    losing = [t for t in trades if t["pnl"] < 0]
+    # 基礎統計（損益與買進成本只取一次，後續統計皆由此推導）
+    pnls = [t["pnl"] for t in trades]
+    costs = [t["entry_price"] * shares + t["buy_fee"] for t in trades]
+    winning = [p for p in pnls if p > 0]
+    losing = [p for p in pnls if p < 0]
 
-    total_profit = sum(t["pnl"] for t in winning)
-    total_loss = sum(t["pnl"] for t in losing)
+    total_profit = sum(winning)
+    total_loss = sum(losing)
 
     # 勝率
     win_rate = len(winning) / total_trades * 100
@@ -177,8 +248,8 @@ def _calc_performance(
         total_profit / abs(total_loss) if total_loss != 0 else None
     )
 
-    # 期望值
-    total_pnl = sum(t["pnl"] for t in trades)
+    # 期望值（損益為 0 的交易不影響總和，可直接由獲利與虧損合計）
+    total_pnl = total_profit + total_loss
     expected_value = total_pnl / total_trades
 
     # 獲利虧損比
@@ -189,18 +260,17 @@ def _calc_performance(
 
     # 最大回撤（基於資產曲線）
     # 以第一筆交易的買入成本（含手續費）作為初始資本
-    initial_capital = trades[0]["entry_price"] * shares + trades[0]["buy_fee"]
-    equity = initial_capital
-    peak = equity
-    max_dd = 0.0
-
-    for trade in trades:
-        equity += trade["pnl"]
-        if equity > peak:
-            peak = equity
-        drawdown = (peak - equity) / peak * 100 if peak > 0 else 0.0
-        if drawdown > max_dd:
-            max_dd = drawdown
+    initial_capital = costs[0]
+    # equity[0] 為初始資本，之後為每筆交易後的資產；peaks 為至今最高資產
+    equity = list(accumulate(pnls, initial=initial_capital))
+    peaks = accumulate(equity, max)
+    max_dd = max(
+        (
+            (peak - value) / peak * 100 if peak > 0 else 0.0
+            for value, peak in zip(equity, peaks)
+        ),
+        default=0.0,
+    )
 
     max_drawdown = -round(max_dd, 2)
 
@@ -216,16 +286,13 @@ def _calc_performance(
         annual_return = 0.0
 
     # 夏普比率（以每筆交易報酬率計算）
-    trade_returns = []
-    for t in trades:
-        cost = t["entry_price"] * shares + t["buy_fee"]
-        if cost > 0:
-            trade_returns.append(t["pnl"] / cost)
-
-    if len(trade_returns) >= 2:
-        avg_return = sum(trade_returns) / len(trade_returns)
+    trade_returns = [pnl / cost for pnl, cost in zip(pnls, costs) if cost > 0]
+
+    n_returns = len(trade_returns)
+    if n_returns >= 2:
+        avg_return = sum(trade_returns) / n_returns
         variance = sum((r - avg_return) ** 2 for r in trade_returns) / (
-            len(trade_returns) - 1
+            n_returns - 1
         )
         std_return = math.sqrt(variance) if variance > 0 else 0.0
         # 年化
@@ -242,26 +309,16 @@ def _calc_performance(
     else:
         sharpe = 0.0
 
-    return [
-        Indicator("win_rate", "勝率", round(win_rate, 1), "%",
-                  "獲利交易佔總交易次數的比例"),
-        Indicator("profit_factor", "獲利因子",
-                  round(profit_factor, 2) if profit_factor is not None else None,
-                  "倍", "總獲利金額除以總虧損金額"),
-        Indicator("expected_value", "期望值", round(expected_value, 2), "元",
-                  "每筆交易的平均預期損益"),
-        Indicator("max_drawdown", "最大回撤", max_drawdown, "%",
-                  "從資產高點到低點的最大跌幅"),
-        Indicator("sharpe_ratio", "夏普比率", round(sharpe, 2), "倍",
-                  "每承受一單位風險所獲得的超額報酬"),
-        Indicator("profit_loss_ratio", "平均獲利虧損比",
-                  round(profit_loss_ratio, 2) if profit_loss_ratio is not None else None,
-                  "倍", "平均獲利金額除以平均虧損金額"),
-        Indicator("annual_return", "年化報酬率", round(annual_return, 2), "%",
-                  "投資報酬換算為年度的複利報酬率"),
-        Indicator("total_trades", "總交易次數", total_trades, "次",
-                  "回測期間的總交易筆數"),
-    ]
+    return _build_indicators([
+        round(win_rate, 1),
+        round(profit_factor, 2) if profit_factor is not None else None,
+        round(expected_value, 2),
+        max_drawdown,
+        round(sharpe, 2),
+        round(profit_loss_ratio, 2) if profit_loss_ratio is not None else None,
+        round(annual_return, 2),
+        total_trades,
+    ])
 
 
 def _extract_relevant_series(
@@ -280,30 +337,18 @@ def _extract_relevant_series(
     Returns:
         篩選後的指標序列字典。
     """
-    excluded = {"0", "20", "30", "50", "70", "80", "收盤價"}
-
     # 收集規則中引用的所有參數
-    referenced: set[str] = set()
-    for group in rule_groups:
-        for cond in group.conditions:
-            referenced.add(cond.left_param)
-            referenced.add(cond.right_param)
+    referenced = {
+        param
+        for group in rule_groups
+        for cond in group.conditions
+        for param in (cond.left_param, cond.right_param)
+    }
 
     # 擴展關聯指標
     expanded: set[str] = set()
-    for param in referenced:
-        if param in excluded:
-            continue
-        expanded.add(param)
-        # 布林通道：任一軌被引用，三條都包含
-        if param in ("上軌", "中軌", "下軌"):
-            expanded.update(("上軌", "中軌", "下軌"))
-        # MACD：任一被引用，三個都包含
-        if param in ("DIF", "MACD", "OSC"):
-            expanded.update(("DIF", "MACD", "OSC"))
-        # KD：任一被引用，兩個都包含
-        if param in ("K", "D"):
-            expanded.update(("K", "D"))
+    for param in referenced - _EXCLUDED_SERIES:
+        expanded.update(_RELATED_SERIES.get(param, (param,)))
 
     result: dict[str, list[float | None]] = {}
     for key in expanded:
@@ -321,7 +366,7 @@ def run_backtest(
     """執行回測。
 
     流程：
-    1. 計算所有技術指標
+    1. 計算規則引用到的技術指標
     2. 產出進出場訊號
     3. 模擬交易
     4. 計算績效指標
@@ -349,8 +394,14 @@ def run_backtest(
         logger.warning("無規則群組，無法執行回測")
         return empty_result
 
-    # 1. 計算技術指標
-    series = indicator_calculator.build_indicator_series(daily_data)
+    # 1. 計算技術指標（只計算規則中引用到的指標）
+    referenced = {
+        param
+        for group in rule_groups
+        for cond in group.conditions
+        for param in (cond.left_param, cond.right_param)
+    }
+    series = indicator_calculator.build_indicator_series(daily_data, referenced)
     n = len(daily_data)
 
     # 2. 產出訊號
@@ -4,6 +4,22 @@
 """
 
 import math
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from itertools import accumulate
+
+# 布林通道滑動更新的相對門檻：視窗離均差平方和低於 mean² × period × 此值時
+# 改以整個視窗重新計算
+_BOLLINGER_RECOMPUTE_EPS = 1e-9
+
+# 指標序列快取最多保留的日線資料組數
+_SERIES_CACHE_SIZE = 32
+
+# 指標序列快取（LRU）：資料內容 key → 指標名稱到序列的字典
+_series_cache: OrderedDict[tuple, dict[str, list[float | None]]] = OrderedDict()
+# Web 伺服器多執行緒共用快取，查詢與淘汰以 lock 保護
+_series_cache_lock = threading.Lock()
 
 
 def calc_ma(closes: list[float], period: int) -> list[float | None]:
@@ -16,17 +32,35 @@ def calc_ma(closes: list[float], period: int) -> list[float | None]:
     Returns:
         與 closes 等長的列表，暖機期不足的位置為 None。
     """
-    n = len(closes)
-    result: list[float | None] = [None] * n
-    if period <= 0 or n < period:
-        return result
+    return calc_ma_many(closes, (period,))[period]
 
-    window_sum = sum(closes[:period])
-    result[period - 1] = window_sum / period
 
-    for i in range(period, n):
-        window_sum += closes[i] - closes[i - period]
-        result[i] = window_sum / period
+def calc_ma_many(
+    closes: list[float],
+    periods: Iterable[int],
+) -> dict[int, list[float | None]]:
+    """一次計算多個期數的簡單移動平均線，共用同一份前綴和。
+
+    Args:
+        closes: 收盤價序列。
+        periods: 移動平均期數。
+
+    Returns:
+        期數到 MA 序列的字典，各序列與 closes 等長，暖機期不足的位置為 None。
+    """
+    n = len(closes)
+    # 前綴和：prefix[i] 為前 i 根收盤價總和，視窗和 = prefix[i + period] - prefix[i]
+    prefix = [0.0, *accumulate(closes)]
+
+    result: dict[int, list[float | None]] = {}
+    for period in periods:
+        values: list[float | None] = [None] * n
+        if 0 < period <= n:
+            values[period - 1:] = [
+                (end - begin) / period
+                for begin, end in zip(prefix, prefix[period:])
+            ]
+        result[period] = values
 
     return result
 
@@ -46,16 +80,20 @@ def calc_rsi(closes: list[float], period: int) -> list[float | None]:
     if period <= 0 or n < period + 1:
         return result
 
-    gains = []
-    losses = []
-    for i in range(1, n):
-        diff = closes[i] - closes[i - 1]
-        gains.append(max(diff, 0.0))
-        losses.append(max(-diff, 0.0))
-
+    # 逐根計算漲跌幅，不另建 gains／losses 列表
     # 初始平均值（前 period 根的簡單平均）
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    prev = closes[0]
+    for close in closes[1:period + 1]:
+        diff = close - prev
+        if diff > 0:
+            avg_gain += diff
+        elif diff < 0:
+            avg_loss -= diff
+        prev = close
+    avg_gain /= period
+    avg_loss /= period
 
     if avg_loss == 0:
         result[period] = 100.0
@@ -64,15 +102,48 @@ def calc_rsi(closes: list[float], period: int) -> list[float | None]:
         result[period] = 100.0 - 100.0 / (1.0 + rs)
 
     # Wilder 平滑
-    for i in range(period, len(gains)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+    keep = period - 1
+    for i in range(period + 1, n):
+        close = closes[i]
+        diff = close - prev
+        prev = close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        avg_gain = (avg_gain * keep + gain) / period
+        avg_loss = (avg_loss * keep + loss) / period
 
         if avg_loss == 0:
-            result[i + 1] = 100.0
+            result[i] = 100.0
         else:
             rs = avg_gain / avg_loss
-            result[i + 1] = 100.0 - 100.0 / (1.0 + rs)
+            result[i] = 100.0 - 100.0 / (1.0 + rs)
+
+    return result
+
+
+def _calc_ema(data: list[float], period: int) -> list[float | None]:
+    """計算指數移動平均線（EMA）。
+
+    初始值為前 period 根的 SMA，之後以 2 / (period + 1) 為平滑係數遞迴。
+
+    Args:
+        data: 輸入序列。
+        period: EMA 期數。
+
+    Returns:
+        與 data 等長的列表，暖機期不足的位置為 None。
+    """
+    n = len(data)
+    result: list[float | None] = [None] * n
+    if n < period:
+        return result
+
+    multiplier = 2.0 / (period + 1)
+    ema = sum(data[:period]) / period
+    result[period - 1] = ema
+    for i in range(period, n):
+        ema = (data[i] - ema) * multiplier + ema
+        result[i] = ema
 
     return result
 
@@ -102,38 +173,25 @@ def calc_macd(
     if n < slow:
         return {"DIF": dif, "MACD": macd_line, "OSC": osc}
 
-    # 計算 EMA
-    def _ema(data: list[float], period: int) -> list[float | None]:
-        result_ema: list[float | None] = [None] * len(data)
-        if len(data) < period:
-            return result_ema
-        # 初始值為前 period 根的 SMA
-        sma = sum(data[:period]) / period
-        result_ema[period - 1] = sma
-        multiplier = 2.0 / (period + 1)
-        for i in range(period, len(data)):
-            result_ema[i] = (data[i] - result_ema[i - 1]) * multiplier + result_ema[i - 1]
-        return result_ema
-
-    ema_fast = _ema(closes, fast)
-    ema_slow = _ema(closes, slow)
-
-    # DIF = 快線 EMA - 慢線 EMA
-    dif_values: list[float] = []
-    for i in range(n):
-        if ema_fast[i] is not None and ema_slow[i] is not None:
-            dif[i] = ema_fast[i] - ema_slow[i]
-            dif_values.append(dif[i])
+    ema_fast = _calc_ema(closes, fast)
+    ema_slow = _calc_ema(closes, slow)
+
+    # DIF = 快線 EMA - 慢線 EMA，兩條 EMA 皆暖機完成後才有值
+    start = max(fast, slow) - 1
+    dif_values = [
+        fast_val - slow_val
+        for fast_val, slow_val in zip(ema_fast[start:], ema_slow[start:])
+    ]
+    dif[start:] = dif_values
 
-    # MACD（訊號線）= DIF 的 EMA
+    # MACD（訊號線）= DIF 的 EMA，OSC = (DIF - MACD) × 2
     if len(dif_values) >= signal:
-        dif_start = n - len(dif_values)
-        macd_vals = _ema(dif_values, signal)
-        for i, val in enumerate(macd_vals):
-            idx = dif_start + i
-            macd_line[idx] = val
-            if val is not None and dif[idx] is not None:
-                osc[idx] = (dif[idx] - val) * 2
+        macd_vals = _calc_ema(dif_values, signal)
+        macd_line[start:] = macd_vals
+        osc[start:] = [
+            None if macd_val is None else (dif_val - macd_val) * 2
+            for dif_val, macd_val in zip(dif_values, macd_vals)
+        ]
 
     return {"DIF": dif, "MACD": macd_line, "OSC": osc}
 
@@ -164,27 +222,42 @@ def calc_kd(
     if n < period:
         return {"K": k_vals, "D": d_vals}
 
-    # 計算 RSV
-    rsv: list[float | None] = [None] * n
-    for i in range(period - 1, n):
-        highest = max(highs[i - period + 1:i + 1])
-        lowest = min(lows[i - period + 1:i + 1])
+    # 計算 RSV 並同步做 K、D 平滑（遞迴平滑法），不另建 RSV 列表
+    # 以單調佇列維護視窗內最高價／最低價的索引，避免每根 K 棒切片重算
+    max_q: deque[int] = deque()
+    min_q: deque[int] = deque()
+    keep = smooth - 1
+    k_prev = 50.0
+    d_prev = 50.0
+    for i in range(n):
+        high = highs[i]
+        while max_q and highs[max_q[-1]] <= high:
+            max_q.pop()
+        max_q.append(i)
+        low = lows[i]
+        while min_q and lows[min_q[-1]] >= low:
+            min_q.pop()
+        min_q.append(i)
+
+        start = i - period + 1
+        if start < 0:
+            continue
+        if max_q[0] < start:
+            max_q.popleft()
+        if min_q[0] < start:
+            min_q.popleft()
+
+        highest = highs[max_q[0]]
+        lowest = lows[min_q[0]]
         if highest == lowest:
-            rsv[i] = 50.0
+            rsv = 50.0
         else:
-            rsv[i] = (closes[i] - lowest) / (highest - lowest) * 100.0
+            rsv = (closes[i] - lowest) / (highest - lowest) * 100.0
 
-    # K、D 平滑（遞迴平滑法）
-    k_prev = 50.0
-    d_prev = 50.0
-    for i in range(period - 1, n):
-        if rsv[i] is not None:
-            k_val = (k_prev * (smooth - 1) + rsv[i]) / smooth
-            d_val = (d_prev * (smooth - 1) + k_val) / smooth
-            k_vals[i] = round(k_val, 2)
-            d_vals[i] = round(d_val, 2)
-            k_prev = k_val
-            d_prev = d_val
+        k_prev = (k_prev * keep + rsv) / smooth
+        d_prev = (d_prev * keep + k_prev) / smooth
+        k_vals[i] = round(k_prev, 2)
+        d_vals[i] = round(d_prev, 2)
 
     return {"K": k_vals, "D": d_vals}
 
@@ -212,11 +285,28 @@ def calc_bollinger(
     if n < period:
         return {"上軌": upper, "中軌": middle, "下軌": lower}
 
+    # 滑動視窗以 Welford 法更新平均與離均差平方和，每根 K 棒 O(1)；
+    # 每 period 根以整個視窗重新計算一次，避免浮點誤差累積。
+    # 劇烈波動的價格移出視窗後，m2 殘留的捨入誤差相對於很小的變異數不可忽略
+    # （平盤時通道寬度應為 0），此時同樣以整個視窗重新計算
+    mean = 0.0
+    m2 = 0.0
     for i in range(period - 1, n):
-        window = closes[i - period + 1:i + 1]
-        mean = sum(window) / period
-        variance = sum((x - mean) ** 2 for x in window) / period
-        std = math.sqrt(variance)
+        start = i - period + 1
+        if start % period != 0:
+            x_in = closes[i]
+            x_out = closes[start - 1]
+            new_mean = mean + (x_in - x_out) / period
+            m2 += (x_in - x_out) * (x_in - new_mean + x_out - mean)
+            mean = new_mean
+        if (
+            start % period == 0
+            or m2 <= _BOLLINGER_RECOMPUTE_EPS * mean * mean * period
+        ):
+            window = closes[start:i + 1]
+            mean = sum(window) / period
+            m2 = sum((x - mean) ** 2 for x in window)
+        std = math.sqrt(m2 / period) if m2 > 0 else 0.0
 
         middle[i] = mean
         upper[i] = mean + std_dev * std
@@ -225,54 +315,114 @@ def calc_bollinger(
     return {"上軌": upper, "中軌": middle, "下軌": lower}
 
 
+def reset_series_cache() -> None:
+    """清除指標序列快取（供測試使用）。"""
+    with _series_cache_lock:
+        _series_cache.clear()
+
+
+def _get_series_cache(daily_data: list[dict]) -> dict[str, list[float | None]]:
+    """取得與日線資料內容對應的指標序列快取。
+
+    以各筆 date、high、low、close 的內容比對，而非物件 id：
+    每次 API 請求的日線資料都是新物件，只有規則變動時內容仍相同。
+    依最近使用順序保留 _SERIES_CACHE_SIZE 組日線資料，
+    切換股票後再切回來仍可命中。
+
+    Args:
+        daily_data: 日線資料列表。
+
+    Returns:
+        可直接讀寫的指標序列快取字典。
+    """
+    key = tuple((d["date"], d["high"], d["low"], d["close"]) for d in daily_data)
+    with _series_cache_lock:
+        cache = _series_cache.get(key)
+        if cache is None:
+            cache = {}
+            _series_cache[key] = cache
+            if len(_series_cache) > _SERIES_CACHE_SIZE:
+                _series_cache.popitem(last=False)
+        else:
+            _series_cache.move_to_end(key)
+    return cache
+
+
 def build_indicator_series(
     daily_data: list[dict],
+    needed: set[str] | None = None,
 ) -> dict[str, list[float | None]]:
-    """根據日線資料建立所有技術指標序列。
+    """根據日線資料建立技術指標序列。
+
+    同一組日線資料已算過的指標直接取自快取，回傳的序列請勿修改。
 
     Args:
         daily_data: 日線資料列表，每筆包含 open、high、low、close 欄位。
+        needed: 需要的參數名稱集合，只計算涵蓋這些名稱的指標；
+            None 表示計算全部指標。收盤價與常數序列一律包含。
 
     Returns:
         指標名稱到序列的字典，key 對應 rule_service 中的參數名稱。
     """
     closes = [d["close"] for d in daily_data]
-    highs = [d["high"] for d in daily_data]
-    lows = [d["low"] for d in daily_data]
     n = len(closes)
+    cache = _get_series_cache(daily_data)
 
     series: dict[str, list[float | None]] = {}
 
-    # 收盤價
-    series["收盤價"] = list(closes)
-
-    # MA
-    for period in (5, 10, 20, 60, 120, 240):
-        series[f"MA{period}"] = calc_ma(closes, period)
+    # 收盤價（各指標函式皆不修改輸入，直接共用同一個列表）；
+    # 收盤價與常數序列也放入快取，同一組資料每次回傳同一物件
+    series["收盤價"] = cache.setdefault("收盤價", closes)
+
+    # MA：尚未快取的期數一次計算，共用同一份前綴和
+    ma_keys = {
+        period: f"MA{period}"
+        for period in (5, 10, 20, 60, 120, 240)
+        if needed is None or f"MA{period}" in needed
+    }
+    missing = [period for period, key in ma_keys.items() if key not in cache]
+    if missing:
+        for period, values in calc_ma_many(closes, missing).items():
+            cache[ma_keys[period]] = values
+    for key in ma_keys.values():
+        series[key] = cache[key]
 
     # RSI
     for period in (6, 12, 24):
-        series[f"RSI{period}"] = calc_rsi(closes, period)
+        key = f"RSI{period}"
+        if needed is None or key in needed:
+            if key not in cache:
+                cache[key] = calc_rsi(closes, period)
+            series[key] = cache[key]
 
     # MACD
-    macd = calc_macd(closes)
-    series["DIF"] = macd["DIF"]
-    series["MACD"] = macd["MACD"]
-    series["OSC"] = macd["OSC"]
+    if needed is None or not needed.isdisjoint(("DIF", "MACD", "OSC")):
+        if "DIF" not in cache:
+            cache.update(calc_macd(closes))
+        for key in ("DIF", "MACD", "OSC"):
+            series[key] = cache[key]
 
     # KD
-    kd = calc_kd(highs, lows, closes)
-    series["K"] = kd["K"]
-    series["D"] = kd["D"]
+    if needed is None or not needed.isdisjoint(("K", "D")):
+        if "K" not in cache:
+            highs = [d["high"] for d in daily_data]
+            lows = [d["low"] for d in daily_data]
+            cache.update(calc_kd(highs, lows, closes))
+        for key in ("K", "D"):
+            series[key] = cache[key]
 
     # 布林通道
-    boll = calc_bollinger(closes)
-    series["上軌"] = boll["上軌"]
-    series["中軌"] = boll["中軌"]
-    series["下軌"] = boll["下軌"]
+    if needed is None or not needed.isdisjoint(("上軌", "中軌", "下軌")):
+        if "中軌" not in cache:
+            cache.update(calc_bollinger(closes))
+        for key in ("上軌", "中軌", "下軌"):
+            series[key] = cache[key]
 
     # 常數序列（用於規則比較）
     for const in (0, 20, 30, 50, 70, 80):
-        series[str(const)] = [float(const)] * n
+        key = str(const)
+        if key not in cache:
+            cache[key] = [float(const)] * n
+        series[key] = cache[key]
 
     return series
@@ -23,6 +23,24 @@ _INDICATOR_PARAMS: dict[IndicatorType, list[str]] = {
 # 記憶體儲存
 _rule_groups: dict[str, RuleGroup] = {}
 
+# 規則儲存版本號，規則每次新增、移除或清空時遞增，供快取判斷是否失效
+_store_version = 0
+
+
+def _bump_version() -> None:
+    """遞增規則儲存版本號。"""
+    global _store_version
+    _store_version += 1
+
+
+def get_store_version() -> int:
+    """取得規則儲存目前的版本號。
+
+    Returns:
+        版本號，規則內容有變動時必定不同。
+    """
+    return _store_version
+
 
 def get_indicator_params(indicator_type: IndicatorType) -> list[str]:
     """取得指定指標類型的可選參數。
@@ -48,6 +66,7 @@ def create_rule_group(name: str, rule_type: str) -> RuleGroup:
     """
     group = RuleGroup(name=name, rule_type=rule_type)
     _rule_groups[group.id] = group
+    _bump_version()
     return group
 
 
@@ -87,6 +106,7 @@ def add_condition(
         group.logic_operators.append(logic_operator)
 
     group.conditions.append(condition)
+    _bump_version()
     return condition
 
 
@@ -113,6 +133,7 @@ def remove_condition(group_id: str, condition_id: str) -> bool:
                 if i > 0:
                     idx = i - 1
                 group.logic_operators.pop(idx)
+            _bump_version()
             return True
 
     return False
@@ -142,6 +163,7 @@ def get_rule_group(group_id: str) -> RuleGroup | None:
 def reset_store() -> None:
     """清空記憶體儲存（供測試使用）。"""
     _rule_groups.clear()
+    _bump_version()
 
 
 def load_default_rules() -> None:
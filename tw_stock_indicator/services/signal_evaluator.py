@@ -3,6 +3,10 @@
 根據 RuleGroup 條件判斷進出場訊號。
 """
 
+import operator
+import threading
+from collections import OrderedDict
+
 from tw_stock_indicator.models.rules import (
     Condition,
     LogicOperator,
@@ -10,100 +14,211 @@ from tw_stock_indicator.models.rules import (
     RuleGroup,
 )
 
+# 無值（暖機期）的浮點數表示；NaN 與任何值比較皆為 False
+_NAN = float("nan")
 
-def _eval_condition(
-    cond: Condition,
-    series: dict[str, list[float | None]],
-    idx: int,
-) -> bool:
-    """評估單一條件是否成立。
+# 比較運算子對應的比較函式
+_COMPARATORS = {
+    Operator.GT: operator.gt,
+    Operator.GTE: operator.ge,
+    Operator.LT: operator.lt,
+    Operator.LTE: operator.le,
+}
+
+# 穿越運算子，比較式寫在 _eval_condition_series 中
+_CROSS_OPERATORS = frozenset({Operator.CROSS_ABOVE, Operator.CROSS_BELOW})
+
+# 跨呼叫的條件結果快取最多保留的筆數
+_SIGNAL_CACHE_SIZE = 128
+
+# 條件結果快取（LRU）：(signature, id(left), id(right), n) → (left, right, hits)。
+# 指標序列來自 indicator_calculator 的快取，同一組日線資料的序列為同一物件；
+# 一併保存 left／right 的參照，確保快取期間其 id 不會被其他物件重用
+_signal_cache: OrderedDict[tuple, tuple] = OrderedDict()
+# Web 伺服器多執行緒共用快取，查詢與淘汰以 lock 保護
+_signal_cache_lock = threading.Lock()
+
+
+def _to_float_series(values: list[float | None], n: int) -> list[float]:
+    """將指標序列轉為以 NaN 表示無值的浮點數列表。
+
+    NaN 與任何值比較皆為 False，與 None 視為條件不成立的規則一致，
+    整段比較時即可省去逐一檢查 None。
 
     Args:
-        cond: 條件物件。
-        series: 指標序列字典。
-        idx: 當前 K 棒索引。
+        values: 指標序列，暖機期為 None。
+        n: K 棒總數，超出的部分捨去。
 
     Returns:
-        條件是否成立。暖機期不足或資料不存在時回傳 False。
+        長度至多 n 的浮點數列表。
     """
-    left_series = series.get(cond.left_param)
-    right_series = series.get(cond.right_param)
+    return [_NAN if v is None else v for v in values[:n]]
 
-    if left_series is None or right_series is None:
-        return False
 
-    left_val = left_series[idx] if idx < len(left_series) else None
-    right_val = right_series[idx] if idx < len(right_series) else None
+def _eval_condition_series(
+    cond: Condition,
+    float_series: dict[str, list[float]],
+    n: int,
+) -> list[bool]:
+    """一次評估單一條件在每根 K 棒是否成立。
 
-    if left_val is None or right_val is None:
-        return False
+    判斷規則：
+    - 任一側序列不存在，或該根 K 棒任一側無值（暖機期）時不成立
+    - 上穿：前一根 left <= right，且當根 left > right
+    - 下穿：前一根 left >= right，且當根 left < right
+    - 穿越需要前一根 K 棒，第一根及前一根無值時不成立
 
-    op = cond.operator
+    Args:
+        cond: 條件物件。
+        float_series: 以 NaN 表示無值的指標序列字典（見 _to_float_series）。
+        n: K 棒總數。
 
-    if op == Operator.CROSS_ABOVE or op == Operator.CROSS_BELOW:
-        # 穿越需要前一根 K 棒
-        if idx < 1:
-            return False
+    Returns:
+        長度 n 的布林列表。暖機期不足或資料不存在的位置為 False。
+    """
+    left = float_series.get(cond.left_param)
+    right = float_series.get(cond.right_param)
 
-        prev_left = left_series[idx - 1] if (idx - 1) < len(left_series) else None
-        prev_right = right_series[idx - 1] if (idx - 1) < len(right_series) else None
+    if left is None or right is None:
+        return [False] * n
 
-        if prev_left is None or prev_right is None:
-            return False
+    op = cond.operator
 
+    if op in _CROSS_OPERATORS:
+        # 穿越需要前一根 K 棒，第一根恆為 False；
+        # 兩種穿越各自寫出比較式，省去逐根呼叫比較函式
+        hits = [False] * min(len(left), len(right), 1)
+        windows = zip(left, right, left[1:], right[1:])
         if op == Operator.CROSS_ABOVE:
-            # 上穿：前一根 left <= right，當根 left > right
-            return prev_left <= prev_right and left_val > right_val
+            hits += [
+                prev_left <= prev_right and left_val > right_val
+                for prev_left, prev_right, left_val, right_val in windows
+            ]
+        else:
+            hits += [
+                prev_left >= prev_right and left_val < right_val
+                for prev_left, prev_right, left_val, right_val in windows
+            ]
+    elif op in _COMPARATORS:
+        hits = list(map(_COMPARATORS[op], left, right))
+    else:
+        return [False] * n
+
+    # 序列長度不足 n 的部分視為無資料
+    hits.extend([False] * (n - len(hits)))
+    return hits
+
 
-        # 下穿：前一根 left >= right，當根 left < right
-        return prev_left >= prev_right and left_val < right_val
+def reset_signal_cache() -> None:
+    """清除跨呼叫的條件結果快取（供測試使用）。"""
+    with _signal_cache_lock:
+        _signal_cache.clear()
 
-    if op == Operator.GT:
-        return left_val > right_val
-    if op == Operator.GTE:
-        return left_val >= right_val
-    if op == Operator.LT:
-        return left_val < right_val
-    if op == Operator.LTE:
-        return left_val <= right_val
 
-    return False
+def _eval_condition_memo(
+    cond: Condition,
+    series: dict[str, list[float | None]],
+    float_series: dict[str, list[float]],
+    n: int,
+    memo: dict[tuple, list[bool]],
+) -> list[bool]:
+    """評估條件整段結果，內容相同的條件重用先前結果。
+
+    先查本次呼叫的 memo，再查跨呼叫的 _signal_cache；
+    兩者皆未命中時才將引用到的序列轉為浮點數並評估。
 
+    Args:
+        cond: 條件物件。
+        series: 指標序列字典。
+        float_series: 已轉換的浮點數序列，依需要逐一補上。
+        n: K 棒總數。
+        memo: 本次呼叫中條件 signature 到評估結果的快取。
 
-def _eval_rule_group(
+    Returns:
+        長度 n 的布林列表，可能與其他條件共用，請勿修改。
+    """
+    signature = cond.signature
+    hits = memo.get(signature)
+    if hits is not None:
+        return hits
+
+    left = series.get(cond.left_param)
+    right = series.get(cond.right_param)
+    cache_key = (signature, id(left), id(right), n)
+    hits = None
+    with _signal_cache_lock:
+        entry = _signal_cache.get(cache_key)
+        # 除 id 外再確認為同一序列物件，id 相同但物件不同時不沿用
+        if entry is not None and entry[0] is left and entry[1] is right:
+            _signal_cache.move_to_end(cache_key)
+            hits = entry[2]
+
+    if hits is None:
+        for param, values in ((cond.left_param, left), (cond.right_param, right)):
+            if values is not None and param not in float_series:
+                float_series[param] = _to_float_series(values, n)
+        hits = _eval_condition_series(cond, float_series, n)
+        with _signal_cache_lock:
+            _signal_cache[cache_key] = (left, right, hits)
+            _signal_cache.move_to_end(cache_key)
+            if len(_signal_cache) > _SIGNAL_CACHE_SIZE:
+                _signal_cache.popitem(last=False)
+
+    memo[signature] = hits
+    return hits
+
+
+def _eval_rule_group_series(
     group: RuleGroup,
     series: dict[str, list[float | None]],
-    idx: int,
-) -> bool:
-    """評估規則群組是否成立。
+    float_series: dict[str, list[float]],
+    n: int,
+    memo: dict[tuple, list[bool]],
+) -> list[bool]:
+    """一次評估規則群組在每根 K 棒是否成立。
 
-    按 logic_operators 依序組合條件結果。
+    按 logic_operators 由左至右依序組合條件結果（不分優先順序），
+    缺少的邏輯運算子視為 AND；無條件的群組恆不成立。
+    以條件為單位逐一合併整段結果，整段結果已確定時
+    （AND 全為 False、OR 全為 True）不再評估後續條件。
 
     Args:
         group: 規則群組。
         series: 指標序列字典。
-        idx: 當前 K 棒索引。
+        float_series: 已轉換的浮點數序列，依需要逐一補上。
+        n: K 棒總數。
+        memo: 條件 signature 到評估結果的快取，跨群組共用，
+            內容相同的條件只評估一次。
 
     Returns:
-        規則群組是否成立。
+        長度 n 的布林列表。
     """
     if not group.conditions:
-        return False
+        return [False] * n
 
-    result = _eval_condition(group.conditions[0], series, idx)
+    result = _eval_condition_memo(
+        group.conditions[0], series, float_series, n, memo
+    )
 
     for i, cond in enumerate(group.conditions[1:], start=0):
-        cond_result = _eval_condition(cond, series, idx)
         logic_op = (
             group.logic_operators[i]
             if i < len(group.logic_operators)
             else LogicOperator.AND
         )
 
+        # 整段結果已確定時（AND 全為 False、OR 全為 True）不必評估此條件
         if logic_op == LogicOperator.AND:
-            result = result and cond_result
-        else:
-            result = result or cond_result
+            if any(result):
+                cond_result = _eval_condition_memo(
+                    cond, series, float_series, n, memo
+                )
+                result = [a and b for a, b in zip(result, cond_result)]
+        elif not all(result):
+            cond_result = _eval_condition_memo(
+                cond, series, float_series, n, memo
+            )
+            result = [a or b for a, b in zip(result, cond_result)]
 
     return result
 
@@ -116,6 +231,7 @@ def generate_signals(
     """產出進出場訊號。
 
     同類型多群組間為 OR 關係（任一觸發即可）。
+    條件結果以序列物件本身為 key 跨呼叫快取，傳入的序列請勿原地修改。
 
     Args:
         rule_groups: 規則群組列表。
@@ -128,20 +244,23 @@ def generate_signals(
     entry_groups = [g for g in rule_groups if g.rule_type == "entry"]
     exit_groups = [g for g in rule_groups if g.rule_type == "exit"]
 
+    # 以條件為單位一次算完整段序列，再以 OR 合併同類型群組；
+    # 進出場群組中內容相同的條件（如 MA5 上穿 MA20）只評估一次，
+    # 序列只在有條件需要評估時才轉為浮點數列表
+    float_series: dict[str, list[float]] = {}
+    memo: dict[tuple, list[bool]] = {}
     entry_signals = [False] * n
-    exit_signals = [False] * n
+    for group in entry_groups:
+        group_signals = _eval_rule_group_series(
+            group, series, float_series, n, memo
+        )
+        entry_signals = [a or b for a, b in zip(entry_signals, group_signals)]
 
-    for i in range(n):
-        # 進場：任一進場群組成立即觸發
-        for group in entry_groups:
-            if _eval_rule_group(group, series, i):
-                entry_signals[i] = True
-                break
-
-        # 出場：任一出場群組成立即觸發
-        for group in exit_groups:
-            if _eval_rule_group(group, series, i):
-                exit_signals[i] = True
-                break
+    exit_signals = [False] * n
+    for group in exit_groups:
+        group_signals = _eval_rule_group_series(
+            group, series, float_series, n, memo
+        )
+        exit_signals = [a or b for a, b in zip(exit_signals, group_signals)]
 
     return {"entry_signals": entry_signals, "exit_signals": exit_signals}
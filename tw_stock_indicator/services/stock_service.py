@@ -5,6 +5,9 @@
 
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
@@ -13,6 +16,78 @@ logger = logging.getLogger(__name__)
 
 _engine: Engine | None = None
 
+# 股票搜尋結果快取：最多保留的關鍵字數與有效秒數（股票清單約每日更新）
+_SEARCH_CACHE_SIZE = 1024
+_SEARCH_CACHE_TTL = 3600
+
+# 日期範圍快取：最多保留的股票數與有效秒數（日線每個交易日最多新增一筆）
+_DATE_RANGE_CACHE_SIZE = 4096
+_DATE_RANGE_CACHE_TTL = 3600
+
+# 查詢結果快取（LRU）：key → (寫入時間, 結果)；Web 伺服器多執行緒共用，以 lock 保護
+_search_cache: OrderedDict[str, tuple[float, tuple[dict, ...]]] = OrderedDict()
+_date_range_cache: OrderedDict[tuple[str, str], tuple[float, dict]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+# 日線查詢以伺服器端游標（PyMySQL SSCursor）分批讀取，
+# 長日期區間不必先將整個結果集緩衝於驅動程式中
+_STREAM_OPTIONS = {"stream_results": True, "yield_per": 1000}
+
+# 以下查詢語句於模組載入時建立一次，各請求共用同一個 TextClause
+
+# 股票搜尋：兩個市場合併為一次查詢，各自保留 LIMIT 20，TWSE 結果在前；
+# 代碼與名稱的尾端空白由資料庫 TRIM 去除
+_SEARCH_QUERY = text(
+    "(SELECT TRIM(SecurityCode) AS code, TRIM(StockName) AS name, "
+    "'TWSE' AS market "
+    "FROM TWSE.StockName "
+    "WHERE SecurityCode LIKE :pattern OR StockName LIKE :pattern "
+    "LIMIT 20) "
+    "UNION ALL "
+    "(SELECT TRIM(Code) AS code, TRIM(Name) AS name, 'TPEX' AS market "
+    "FROM TPEX.StockName "
+    "WHERE Code LIKE :pattern OR Name LIKE :pattern "
+    "LIMIT 20)"
+)
+
+# 各市場的日線查詢
+_DAILY_QUERIES = {
+    "TWSE": text(
+        "SELECT Date AS date, "
+        "OpeningPrice AS open, HighestPrice AS high, "
+        "LowestPrice AS low, ClosingPrice AS close, "
+        "TradeVolume AS volume "
+        "FROM TWSE.DailyPrice "
+        "WHERE SecurityCode = :code "
+        "AND Date BETWEEN :start AND :end "
+        "ORDER BY Date"
+    ),
+    "TPEX": text(
+        "SELECT Date AS date, "
+        "`Open` AS open, High AS high, "
+        "Low AS low, `Close` AS close, "
+        "TradeVolume AS volume "
+        "FROM TPEX.DailyPrice "
+        "WHERE Code = :code "
+        "AND Date BETWEEN :start AND :end "
+        "ORDER BY Date"
+    ),
+}
+
+# 各市場的可查詢日期範圍查詢
+_DATE_RANGE_QUERIES = {
+    "TWSE": text(
+        "SELECT MIN(Date) AS min_date, MAX(Date) AS max_date "
+        "FROM TWSE.DailyPrice "
+        "WHERE SecurityCode = :code"
+    ),
+    "TPEX": text(
+        "SELECT MIN(Date) AS min_date, MAX(Date) AS max_date "
+        "FROM TPEX.DailyPrice "
+        "WHERE Code = :code"
+    ),
+}
+
 
 def get_db_engine() -> Engine:
     """建立或取得 SQLAlchemy engine。
@@ -33,24 +108,81 @@ def get_db_engine() -> Engine:
     port = os.environ.get("DB_PORT", "3306")
 
     url = f"mysql+pymysql://{user}:{password}@{host}:{port}/"
-    _engine = create_engine(url, pool_pre_ping=True)
+    # 明確設定連線池大小，並在 MySQL wait_timeout 前回收閒置連線；
+    # LIFO 讓常用連線保持溫熱，多餘連線自然閒置逾時
+    _engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=10,
+        pool_recycle=1800,
+        pool_use_lifo=True,
+    )
     logger.info("資料庫連線建立完成: %s:%s", host, port)
     return _engine
 
 
 def reset_engine() -> None:
-    """重設 engine（供測試使用）。"""
+    """重設 engine 並清除搜尋快取（供測試使用）。"""
     global _engine
     if _engine is not None:
         _engine.dispose()
     _engine = None
+    reset_query_cache()
+
+
+def reset_query_cache() -> None:
+    """清除股票搜尋與日期範圍的查詢結果快取。"""
+    with _cache_lock:
+        _search_cache.clear()
+        _date_range_cache.clear()
+
+
+def _cache_lookup(cache: OrderedDict, key, ttl: float, now: float):
+    """查詢未過期的快取結果。
+
+    Args:
+        cache: 查詢結果快取。
+        key: 快取 key。
+        ttl: 有效秒數。
+        now: 目前的 time.monotonic() 值。
+
+    Returns:
+        快取的結果，未命中或已過期時回傳 None。
+    """
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None or now - entry[0] >= ttl:
+            return None
+        cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_store(cache: OrderedDict, key, value, max_size: int, now: float) -> None:
+    """寫入快取結果，超過上限時移除最久未使用的項目。
+
+    Args:
+        cache: 查詢結果快取。
+        key: 快取 key。
+        value: 要快取的結果，呼叫端不應再修改。
+        max_size: 快取最多保留的筆數。
+        now: 查詢時的 time.monotonic() 值。
+    """
+    with _cache_lock:
+        cache[key] = (now, value)
+        cache.move_to_end(key)
+        if len(cache) > max_size:
+            cache.popitem(last=False)
 
 
 def search_stocks(keyword: str) -> list[dict]:
     """搜尋股票代碼或名稱。
 
-    同時查詢 TWSE.StockName 與 TPEX.StockName，
-    支援代碼或名稱模糊搜尋。
+    以單一 UNION ALL 查詢同時搜尋 TWSE.StockName 與 TPEX.StockName，
+    以代碼或名稱的開頭比對（LIKE 'keyword%'），可使用索引範圍掃描，
+    不必每次輸入都掃描整張表。
+
+    相同關鍵字的結果快取 _SEARCH_CACHE_TTL 秒，輸入時重複的查詢不必再連線資料庫。
 
     Args:
         keyword: 搜尋關鍵字（代碼或名稱）。
@@ -58,44 +190,52 @@ def search_stocks(keyword: str) -> list[dict]:
     Returns:
         符合的股票列表，每筆包含 code、name、market 欄位。
     """
-    engine = get_db_engine()
-    results = []
-    like_pattern = f"%{keyword}%"
-
-    twse_query = text(
-        "SELECT SecurityCode AS code, StockName AS name "
-        "FROM TWSE.StockName "
-        "WHERE SecurityCode LIKE :pattern OR StockName LIKE :pattern "
-        "LIMIT 20"
-    )
+    keyword = keyword.strip()
+    now = time.monotonic()
 
-    tpex_query = text(
-        "SELECT Code AS code, Name AS name "
-        "FROM TPEX.StockName "
-        "WHERE Code LIKE :pattern OR Name LIKE :pattern "
-        "LIMIT 20"
-    )
+    cached = _cache_lookup(_search_cache, keyword, _SEARCH_CACHE_TTL, now)
+    if cached is not None:
+        return [dict(row) for row in cached]
+
+    engine = get_db_engine()
+    like_pattern = f"{keyword}%"
 
     with engine.connect() as conn:
-        rows = conn.execute(twse_query, {"pattern": like_pattern})
-        for row in rows.mappings():
-            results.append({
-                "code": row["code"].strip(),
-                "name": row["name"].strip(),
-                "market": "TWSE",
-            })
-
-        rows = conn.execute(tpex_query, {"pattern": like_pattern})
-        for row in rows.mappings():
-            results.append({
-                "code": row["code"].strip(),
-                "name": row["name"].strip(),
-                "market": "TPEX",
-            })
+        rows = conn.execute(_SEARCH_QUERY, {"pattern": like_pattern})
+        results = [dict(row) for row in rows.mappings()]
+
+    # 快取保存獨立的副本，呼叫端修改回傳結果不影響快取
+    _cache_store(
+        _search_cache, keyword, tuple(dict(row) for row in results),
+        _SEARCH_CACHE_SIZE, now,
+    )
 
     return results
 
 
+def _format_daily_row(row) -> dict:
+    """將日線查詢結果的一列轉為統一格式。
+
+    Args:
+        row: 含 date、open、high、low、close、volume 欄位的查詢結果列。
+
+    Returns:
+        日線資料字典，價格為 float、成交量為 int，無值時為 None。
+    """
+    # 每個欄位只取值一次
+    open_, high, low, close, volume = (
+        row["open"], row["high"], row["low"], row["close"], row["volume"]
+    )
+    return {
+        "date": str(row["date"]),
+        "open": float(open_) if open_ else None,
+        "high": float(high) if high else None,
+        "low": float(low) if low else None,
+        "close": float(close) if close else None,
+        "volume": int(volume) if volume else None,
+    }
+
+
 def get_stock_daily(
     market: str,
     code: str,
@@ -116,48 +256,17 @@ def get_stock_daily(
     Returns:
         日線資料列表，每筆包含 date、open、high、low、close、volume。
     """
-    engine = get_db_engine()
-
-    if market == "TWSE":
-        query = text(
-            "SELECT Date AS date, "
-            "OpeningPrice AS open, HighestPrice AS high, "
-            "LowestPrice AS low, ClosingPrice AS close, "
-            "TradeVolume AS volume "
-            "FROM TWSE.DailyPrice "
-            "WHERE SecurityCode = :code "
-            "AND Date BETWEEN :start AND :end "
-            "ORDER BY Date"
-        )
-    elif market == "TPEX":
-        query = text(
-            "SELECT Date AS date, "
-            "`Open` AS open, High AS high, "
-            "Low AS low, `Close` AS close, "
-            "TradeVolume AS volume "
-            "FROM TPEX.DailyPrice "
-            "WHERE Code = :code "
-            "AND Date BETWEEN :start AND :end "
-            "ORDER BY Date"
-        )
-    else:
+    query = _DAILY_QUERIES.get(market)
+    if query is None:
         logger.warning("不支援的市場別: %s", market)
         return []
 
+    engine = get_db_engine()
     with engine.connect() as conn:
-        rows = conn.execute(
+        rows = conn.execution_options(**_STREAM_OPTIONS).execute(
             query, {"code": code, "start": start_date, "end": end_date}
         )
-        results = []
-        for row in rows.mappings():
-            results.append({
-                "date": str(row["date"]),
-                "open": float(row["open"]) if row["open"] else None,
-                "high": float(row["high"]) if row["high"] else None,
-                "low": float(row["low"]) if row["low"] else None,
-                "close": float(row["close"]) if row["close"] else None,
-                "volume": int(row["volume"]) if row["volume"] else None,
-            })
+        results = [_format_daily_row(row) for row in rows.mappings()]
 
     return results
 
@@ -165,6 +274,8 @@ def get_stock_daily(
 def get_date_range(market: str, code: str) -> dict:
     """取得指定股票可查詢的日期範圍。
 
+    結果依（market, code）快取 _DATE_RANGE_CACHE_TTL 秒。
+
     Args:
         market: 市場別（TWSE 或 TPEX）。
         code: 股票代碼。
@@ -172,29 +283,27 @@ def get_date_range(market: str, code: str) -> dict:
     Returns:
         包含 min_date 與 max_date 的字典。
     """
-    engine = get_db_engine()
-
-    if market == "TWSE":
-        query = text(
-            "SELECT MIN(Date) AS min_date, MAX(Date) AS max_date "
-            "FROM TWSE.DailyPrice "
-            "WHERE SecurityCode = :code"
-        )
-    elif market == "TPEX":
-        query = text(
-            "SELECT MIN(Date) AS min_date, MAX(Date) AS max_date "
-            "FROM TPEX.DailyPrice "
-            "WHERE Code = :code"
-        )
-    else:
+    query = _DATE_RANGE_QUERIES.get(market)
+    if query is None:
         return {"min_date": None, "max_date": None}
 
+    key = (market, code)
+    now = time.monotonic()
+    cached = _cache_lookup(_date_range_cache, key, _DATE_RANGE_CACHE_TTL, now)
+    if cached is not None:
+        return dict(cached)
+
+    result = {"min_date": None, "max_date": None}
+    engine = get_db_engine()
     with engine.connect() as conn:
         row = conn.execute(query, {"code": code}).mappings().first()
         if row and row["min_date"]:
-            return {
+            result = {
                 "min_date": str(row["min_date"]),
                 "max_date": str(row["max_date"]),
             }
 
-    return {"min_date": None, "max_date": None}
+    _cache_store(
+        _date_range_cache, key, dict(result), _DATE_RANGE_CACHE_SIZE, now
+    )
+    return result
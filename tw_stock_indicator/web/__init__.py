@@ -1,10 +1,15 @@
 """Flask 應用程式工廠模組。"""
 
 import os
+from typing import Any
 
-from flask import Flask
+import orjson
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
 
 from tw_stock_indicator.services import rule_service
+from tw_stock_indicator.web.routes.api import api_bp
+from tw_stock_indicator.web.routes.dashboard import dashboard_bp
 
 
 class ScriptNameMiddleware:
@@ -39,6 +44,64 @@ class ScriptNameMiddleware:
         return self.app(environ, start_response)
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """以 orjson 序列化與解析 JSON 的 Flask JSON provider。
+
+    orjson 直接輸出 UTF-8 bytes，API 回應不再經過 str 編碼；
+    request.get_json() 也會改用 orjson 解析。無法處理的型別
+    （例如 Decimal）仍交由 DefaultJSONProvider.default 轉換。
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """序列化為 JSON 字串。
+
+        帶有 indent 等 json.dumps 參數時（例如模板 tojson）改用標準函式庫。
+
+        Args:
+            obj: 要序列化的資料。
+            **kwargs: json.dumps 參數。
+
+        Returns:
+            JSON 字串。
+        """
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        """解析 JSON 字串或 UTF-8 bytes。
+
+        Args:
+            s: JSON 文字或 UTF-8 bytes。
+            **kwargs: json.loads 參數，帶有參數時改用標準函式庫。
+
+        Returns:
+            解析後的資料。
+        """
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """將資料序列化為 JSON 回應，直接以 bytes 作為回應內容。
+
+        Args:
+            *args: 單一值，或多個值視為列表序列化。
+            **kwargs: 視為字典序列化。
+
+        Returns:
+            mimetype 為 application/json 的 Response。
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype,
+        )
+
+
 def create_app() -> Flask:
     """建立並設定 Flask 應用程式。
 
@@ -49,9 +112,7 @@ def create_app() -> Flask:
         已註冊藍圖的 Flask app 實例。
     """
     app = Flask(__name__)
-
-    from tw_stock_indicator.web.routes.api import api_bp
-    from tw_stock_indicator.web.routes.dashboard import dashboard_bp
+    app.json = OrjsonProvider(app)
 
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(api_bp)
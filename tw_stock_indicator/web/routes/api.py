@@ -3,45 +3,162 @@
 提供規則 CRUD、指標參數查詢與股票資料查詢的 RESTful API。
 """
 
+import hashlib
 import logging
-from dataclasses import asdict
-
-from flask import Blueprint, jsonify, request
-
-from tw_stock_indicator.models.rules import IndicatorType, LogicOperator, Operator
+import os
+import uuid
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from flask import Blueprint, current_app, jsonify, request
+
+from tw_stock_indicator.models.rules import (
+    Condition,
+    IndicatorType,
+    LogicOperator,
+    Operator,
+)
 from tw_stock_indicator.services import backtest_service, rule_service, stock_service
 
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# 規則 ETag 的前綴：規則儲存於各行程記憶體中，版本號只在同一行程內有意義，
+# 加上行程識別避免不同 worker 的相同版本號被視為相同內容
+_RULES_ETAG_PREFIX = f"{uuid.uuid4().hex[:12]}-{os.getpid()}"
+
+# 請求參數字串到列舉成員的對照表，取代逐次以 Enum(value) 建構與捕捉例外
+_INDICATOR_TYPES = {t.value: t for t in IndicatorType}
+_OPERATORS = {o.value: o for o in Operator}
+_LOGIC_OPERATORS = {lo.value: lo for lo in LogicOperator}
+
+
+# 規則列表回應的快取：(規則儲存版本號, 已編碼的 JSON bytes)
+_rules_body_cache: tuple[int, bytes] | None = None
+
+
+def _lookup_enum(table: dict, value: Any) -> Any:
+    """依請求中的值查詢列舉成員。
+
+    Args:
+        table: 值到列舉成員的對照表。
+        value: 請求中的值，可能不是字串。
+
+    Returns:
+        對應的列舉成員，查無時回傳 None。
+    """
+    return table.get(value) if isinstance(value, str) else None
+
+
+@lru_cache(maxsize=None)
+def _indicator_params_body(indicator_type: IndicatorType) -> bytes:
+    """取得指標可選參數的 JSON 回應內容。
+
+    參數對照在執行期間固定不變，每種指標只編碼一次。
+
+    Args:
+        indicator_type: 技術指標類型。
+
+    Returns:
+        已編碼的 JSON bytes。
+    """
+    params = rule_service.get_indicator_params(indicator_type)
+    return orjson.dumps({"params": params})
+
+
+@lru_cache(maxsize=None)
+def _indicator_params_etag(indicator_type: IndicatorType) -> str:
+    """取得指標可選參數回應的 ETag（回應內容的雜湊值）。
+
+    Args:
+        indicator_type: 技術指標類型。
+
+    Returns:
+        ETag 字串。
+    """
+    return hashlib.sha1(_indicator_params_body(indicator_type)).hexdigest()
+
 
 @api_bp.route("/indicators/<indicator_type>/params")
 def get_indicator_params(indicator_type: str):
-    """取得指標可選參數。"""
-    try:
-        it = IndicatorType(indicator_type)
-    except ValueError:
+    """取得指標可選參數。
+
+    回應帶 ETag，客戶端以 If-None-Match 重新驗證時回傳 304。
+    """
+    it = _INDICATOR_TYPES.get(indicator_type)
+    if it is None:
         return jsonify({"error": f"未知的指標類型: {indicator_type}"}), 400
 
-    params = rule_service.get_indicator_params(it)
-    return jsonify({"params": params})
+    response = current_app.response_class(
+        _indicator_params_body(it), mimetype="application/json"
+    )
+    response.set_etag(_indicator_params_etag(it))
+    return response.make_conditional(request)
+
+
+def _condition_to_dict(c: Condition) -> dict:
+    """將條件轉為 JSON 回應用的字典。
+
+    Condition 只有平面欄位，直接取值即可，不需 asdict 的遞迴複製。
+
+    Args:
+        c: 條件物件。
+
+    Returns:
+        條件欄位字典，列舉以其值表示。
+    """
+    return {
+        "indicator_type": c.indicator_type.value,
+        "left_param": c.left_param,
+        "operator": c.operator.value,
+        "right_param": c.right_param,
+        "id": c.id,
+    }
+
+
+def _rules_body(version: int) -> bytes:
+    """取得規則列表的 JSON 回應內容，同一版本號只序列化一次。
+
+    Args:
+        version: 規則儲存目前的版本號。
+
+    Returns:
+        已編碼的 JSON bytes。
+    """
+    global _rules_body_cache
+    if _rules_body_cache is None or _rules_body_cache[0] != version:
+        result = [
+            {
+                "id": g.id,
+                "name": g.name,
+                "rule_type": g.rule_type,
+                "conditions": [_condition_to_dict(c) for c in g.conditions],
+                "logic_operators": [lo.value for lo in g.logic_operators],
+            }
+            for g in rule_service.get_all_rule_groups()
+        ]
+        _rules_body_cache = (version, orjson.dumps(result))
+    return _rules_body_cache[1]
 
 
 @api_bp.route("/rules")
 def list_rules():
-    """列出所有規則群組。"""
-    groups = rule_service.get_all_rule_groups()
-    result = []
-    for g in groups:
-        result.append({
-            "id": g.id,
-            "name": g.name,
-            "rule_type": g.rule_type,
-            "conditions": [asdict(c) for c in g.conditions],
-            "logic_operators": [lo.value for lo in g.logic_operators],
-        })
-    return jsonify(result)
+    """列出所有規則群組。
+
+    以規則儲存版本號作為 ETag，規則未變動時直接回傳 304，不重新序列化。
+    """
+    version = rule_service.get_store_version()
+    etag = f"{_RULES_ETAG_PREFIX}-{version}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(
+            _rules_body(version), mimetype="application/json"
+        )
+    response.set_etag(etag)
+    return response
 
 
 @api_bp.route("/rules", methods=["POST"])
@@ -70,18 +187,25 @@ def add_condition(group_id: str):
         if field_name not in data:
             return jsonify({"error": f"缺少欄位: {field_name}"}), 400
 
-    try:
-        indicator_type = IndicatorType(data["indicator_type"])
-        operator = Operator(data["operator"])
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
+    indicator_type = _lookup_enum(_INDICATOR_TYPES, data["indicator_type"])
+    if indicator_type is None:
+        return jsonify({
+            "error": f"{data['indicator_type']!r} is not a valid IndicatorType"
+        }), 400
+
+    operator = _lookup_enum(_OPERATORS, data["operator"])
+    if operator is None:
+        return jsonify({
+            "error": f"{data['operator']!r} is not a valid Operator"
+        }), 400
 
     logic_op = LogicOperator.AND
     if "logic_operator" in data:
-        try:
-            logic_op = LogicOperator(data["logic_operator"])
-        except ValueError as e:
-            return jsonify({"error": str(e)}), 400
+        logic_op = _lookup_enum(_LOGIC_OPERATORS, data["logic_operator"])
+        if logic_op is None:
+            return jsonify({
+                "error": f"{data['logic_operator']!r} is not a valid LogicOperator"
+            }), 400
 
     condition = rule_service.add_condition(
         group_id, indicator_type, data["left_param"], operator,
@@ -153,10 +277,36 @@ def get_stock_daily(market: str, code: str):
 def run_backtest():
     """執行回測計算。"""
     data = request.get_json()
-    if not data or "daily_data" not in data:
+    if not data:
         return jsonify({"error": "缺少 daily_data 欄位"}), 400
 
-    daily_data = data["daily_data"]
+    # 以股票與日期區間查詢時，回應一併附上查得的日線資料供前端繪圖
+    include_daily = "daily_data" not in data
+    if not include_daily:
+        daily_data = data["daily_data"]
+    elif all(key in data for key in ("market", "code", "start", "end")):
+        # 只傳股票與日期區間時由伺服器直接查詢日線，
+        # 客戶端不必再上傳剛取得的整段日線資料
+        market = str(data["market"]).upper()
+        if market not in ("TWSE", "TPEX"):
+            return jsonify({"error": "market 必須為 TWSE 或 TPEX"}), 400
+        code, start, end = data["code"], data["start"], data["end"]
+        if not isinstance(code, str) or not code:
+            return jsonify({"error": "code 必須為非空字串"}), 400
+        if not (isinstance(start, str) and start and isinstance(end, str) and end):
+            return jsonify({"error": "需要 start 和 end 參數"}), 400
+        try:
+            daily_data = stock_service.get_stock_daily(
+                market, code, start, end
+            )
+        except Exception:
+            logger.exception("股價查詢失敗")
+            return jsonify({"error": "資料庫查詢失敗"}), 500
+    else:
+        return jsonify({
+            "error": "缺少 daily_data 欄位（或 market、code、start、end 欄位）"
+        }), 400
+
     if not daily_data or len(daily_data) < 2:
         return jsonify({"error": "日線資料不足（至少需要 2 筆）"}), 400
 
@@ -185,11 +335,14 @@ def run_backtest():
             "formatted_value": ind.formatted_value(),
         })
 
-    return jsonify({
+    response = {
         "indicators": indicators,
         "trades": backtest_result["trades"],
         "indicator_series": backtest_result["indicator_series"],
-    })
+    }
+    if include_daily:
+        response["daily_data"] = daily_data
+    return jsonify(response)
 
 
 @api_bp.route("/stocks/<market>/<code>/date-range")
@@ -3,26 +3,47 @@
 提供首頁儀表板頁面的路由。
 """
 
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, render_template, request
 
 from tw_stock_indicator.models.rules import IndicatorType, Operator
 from tw_stock_indicator.services import indicator_service, rule_service
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
+# 下拉選單用的列舉值，列舉內容固定，模組載入時建立一次
+_INDICATOR_TYPES = tuple(t.value for t in IndicatorType)
+_OPERATORS = tuple(o.value for o in Operator)
+
+# 最近一次渲染的首頁：((SCRIPT_NAME 前綴, 規則儲存版本號), HTML bytes)
+_index_cache: tuple[tuple[str, int], bytes] | None = None
+
 
 @dashboard_bp.route("/")
 def index():
-    """渲染儀表板首頁。"""
+    """渲染儀表板首頁。
+
+    首頁內容只取決於 SCRIPT_NAME 前綴與規則群組，兩者未變動時
+    直接回傳先前渲染好的 HTML，不重新執行 Jinja 渲染。
+    """
+    global _index_cache
+    key = (request.script_root, rule_service.get_store_version())
+    if _index_cache is None or _index_cache[0] != key:
+        _index_cache = (key, _render_index().encode("utf-8"))
+    return current_app.response_class(_index_cache[1], mimetype="text/html")
+
+
+def _render_index() -> str:
+    """以目前的規則群組渲染儀表板首頁。
+
+    Returns:
+        首頁 HTML。
+    """
     indicators = indicator_service.get_demo_indicators()
     rule_groups = rule_service.get_all_rule_groups()
-    indicator_types = [t.value for t in IndicatorType]
-    operators = [o.value for o in Operator]
-
     return render_template(
         "dashboard.html",
         indicators=indicators,
         rule_groups=rule_groups,
-        indicator_types=indicator_types,
-        operators=operators,
+        indicator_types=_INDICATOR_TYPES,
+        operators=_OPERATORS,
     )
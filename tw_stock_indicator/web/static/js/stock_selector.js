@@ -167,7 +167,7 @@
             });
     }
 
-    /** 計算按鈕點擊：載入日線 → 呼叫回測 API → 更新指標 */
+    /** 計算按鈕點擊：呼叫回測 API（伺服器查詢日線並回傳）→ 更新指標與圖表 */
     queryBtn.addEventListener('click', function () {
         if (!currentStock) return;
 
@@ -182,32 +182,18 @@
         queryBtn.disabled = true;
         queryBtn.classList.add('btn-calculating');
         queryBtn.textContent = '計算中...';
-        showLoadStatus('載入日線資料中...', 'info');
+        showLoadStatus('載入日線資料並執行回測中...', 'info');
 
-        var url = BASE_URL + '/api/stocks/' + currentStock.market + '/'
-            + currentStock.code + '/daily?start=' + start + '&end=' + end;
-
-        fetch(url)
-            .then(function (res) { return res.json(); })
-            .then(function (data) {
-                if (data.error) {
-                    showLoadStatus(data.error, 'error');
-                    resetBtn();
-                    return;
-                }
-
-                window.currentStockData = data;
-                showLoadStatus(
-                    '已載入 ' + data.length + ' 筆日線資料，正在執行回測...',
-                    'info'
-                );
-
-                // 呼叫回測 API
-                return runBacktest(data, window.currentShares);
-            })
+        // 伺服器依股票與區間查詢日線一次，回測與圖表使用同一份資料
+        runBacktest(
+            currentStock.market, currentStock.code, start, end,
+            window.currentShares
+        )
             .then(function (result) {
                 if (!result) return;
 
+                window.currentStockData = result.daily_data;
+
                 // 更新指標卡片
                 updateIndicatorCards(result.indicators);
 
@@ -238,12 +224,15 @@
     });
 
     /** 呼叫回測 API */
-    function runBacktest(dailyData, shares) {
+    function runBacktest(market, code, start, end, shares) {
         return fetch(BASE_URL + '/api/backtest', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
-                daily_data: dailyData,
+                market: market,
+                code: code,
+                start: start,
+                end: end,
                 shares: shares
             })
         })